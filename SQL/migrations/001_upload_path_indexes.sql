@@ -0,0 +1,13 @@
+-- ========================================
+-- UPLOAD PATH INDEXES
+-- Upload blobs are content-addressed and shared between rows, so
+-- release_upload and gc_uploads.py look rows up by file path.
+-- Run outside a transaction (CONCURRENTLY).
+-- ========================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jobs_job_description_url
+    ON job_postings(job_description_url);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_referrals_resume_url
+    ON referrals(resume_url);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_referrals_candidate_photo_url
+    ON referrals(candidate_photo_url);
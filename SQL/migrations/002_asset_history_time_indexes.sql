@@ -0,0 +1,15 @@
+-- ========================================
+-- ASSET HISTORY TIMELINE INDEXES
+-- Per-asset and per-assignee history pages seek on
+-- (owner, assigned_date, id); the composite indexes make the
+-- single-column ones redundant.
+-- Run outside a transaction (CONCURRENTLY).
+-- ========================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_asset_history_asset_date
+    ON asset_history(asset_id, assigned_date, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_asset_history_assignee_date
+    ON asset_history(assignee_user_id, assigned_date, id);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_asset_history_asset_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_asset_history_assignee;
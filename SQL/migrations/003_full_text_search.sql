@@ -0,0 +1,28 @@
+-- ========================================
+-- FULL-TEXT SEARCH
+-- Weighted tsvector columns kept up to date by PostgreSQL as stored
+-- generated columns, each with a GIN index for /api/search.
+-- Adding a stored generated column rewrites the table; run in a
+-- maintenance window on large tables. The indexes are built
+-- CONCURRENTLY, so run this file outside a transaction.
+-- ========================================
+
+ALTER TABLE referrals ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(candidate_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(skills, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(about_candidate, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(notes, '')), 'D')
+    ) STORED;
+
+ALTER TABLE job_postings ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(job_title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(required_skills, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(job_description_text, '')), 'C')
+    ) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_referrals_search
+    ON referrals USING GIN (search_vector);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_job_postings_search
+    ON job_postings USING GIN (search_vector);
@@ -0,0 +1,39 @@
+-- ========================================
+-- DOCUMENT TEXTS
+-- Text extracted from uploaded resumes and JDs by the background
+-- extraction worker (text_extraction.py), one row per upload blob.
+-- ========================================
+
+CREATE SEQUENCE IF NOT EXISTS document_texts_seq START WITH 1 INCREMENT BY 1;
+
+CREATE TABLE IF NOT EXISTS document_texts (
+    id INTEGER PRIMARY KEY DEFAULT nextval('document_texts_seq'),
+    file_path VARCHAR(500) UNIQUE NOT NULL,
+    kind VARCHAR(30) NOT NULL
+        CHECK (kind IN ('resume', 'job_description')),
+    status VARCHAR(20) DEFAULT 'pending'
+        CHECK (status IN ('pending', 'processing', 'done', 'failed', 'unsupported')),
+    text TEXT,
+    error TEXT,
+    attempts INTEGER DEFAULT 0,
+    claimed_at TIMESTAMP,
+    extracted_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_document_texts_status ON document_texts(status, id);
+
+CREATE TRIGGER update_document_texts_updated_at
+    BEFORE UPDATE ON document_texts
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Queue existing uploads; the worker picks them up in id order
+INSERT INTO document_texts (file_path, kind)
+SELECT DISTINCT resume_url, 'resume' FROM referrals WHERE resume_url IS NOT NULL
+ON CONFLICT (file_path) DO NOTHING;
+
+INSERT INTO document_texts (file_path, kind)
+SELECT DISTINCT job_description_url, 'job_description' FROM job_postings WHERE job_description_url IS NOT NULL
+ON CONFLICT (file_path) DO NOTHING;
@@ -0,0 +1,48 @@
+-- ========================================
+-- TABLE VERSIONS
+-- Change counters per table, bumped by statement-level triggers.
+-- List endpoints derive weak ETags from them (table_versions.py).
+-- Each write then also updates one counter row, which serializes
+-- concurrent writers to the same table until they commit.
+-- ========================================
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO table_versions (table_name, version) VALUES
+    ('users', 0), ('job_postings', 0), ('referrals', 0), ('assets', 0)
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_table_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS bump_users_version ON users;
+CREATE TRIGGER bump_users_version
+    AFTER INSERT OR UPDATE OR DELETE ON users
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS bump_job_postings_version ON job_postings;
+CREATE TRIGGER bump_job_postings_version
+    AFTER INSERT OR UPDATE OR DELETE ON job_postings
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS bump_referrals_version ON referrals;
+CREATE TRIGGER bump_referrals_version
+    AFTER INSERT OR UPDATE OR DELETE ON referrals
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS bump_assets_version ON assets;
+CREATE TRIGGER bump_assets_version
+    AFTER INSERT OR UPDATE OR DELETE ON assets
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_table_version();
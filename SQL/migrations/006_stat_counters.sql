@@ -0,0 +1,106 @@
+-- ========================================
+-- DASHBOARD STAT COUNTERS
+-- Row counts per group for /api/stats, kept current by row-level
+-- triggers on referrals and assets (stats.py). Rebuild or verify
+-- with `python stats.py --rebuild` / `--check`.
+-- Run in one transaction so no write lands between the backfill
+-- and the triggers.
+-- ========================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS stat_counters (
+    metric VARCHAR(100) NOT NULL,
+    group_key VARCHAR(255) NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, group_key)
+);
+
+CREATE OR REPLACE FUNCTION bump_stat_counter(p_metric TEXT, p_group TEXT, p_delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO stat_counters (metric, group_key, count)
+    VALUES (p_metric, COALESCE(p_group, ''), p_delta)
+    ON CONFLICT (metric, group_key) DO UPDATE SET count = stat_counters.count + p_delta;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION maintain_referrals_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_stat_counter('referrals.status', NEW.status::text, 1);
+        PERFORM bump_stat_counter('referrals.department', NEW.department::text, 1);
+        PERFORM bump_stat_counter('referrals.job_id', NEW.job_id::text, 1);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_stat_counter('referrals.status', OLD.status::text, -1);
+        PERFORM bump_stat_counter('referrals.department', OLD.department::text, -1);
+        PERFORM bump_stat_counter('referrals.job_id', OLD.job_id::text, -1);
+    ELSE
+        IF OLD.status IS DISTINCT FROM NEW.status THEN
+            PERFORM bump_stat_counter('referrals.status', OLD.status::text, -1);
+            PERFORM bump_stat_counter('referrals.status', NEW.status::text, 1);
+        END IF;
+        IF OLD.department IS DISTINCT FROM NEW.department THEN
+            PERFORM bump_stat_counter('referrals.department', OLD.department::text, -1);
+            PERFORM bump_stat_counter('referrals.department', NEW.department::text, 1);
+        END IF;
+        IF OLD.job_id IS DISTINCT FROM NEW.job_id THEN
+            PERFORM bump_stat_counter('referrals.job_id', OLD.job_id::text, -1);
+            PERFORM bump_stat_counter('referrals.job_id', NEW.job_id::text, 1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION maintain_assets_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_stat_counter('assets.status', NEW.status::text, 1);
+        PERFORM bump_stat_counter('assets.category', NEW.category::text, 1);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_stat_counter('assets.status', OLD.status::text, -1);
+        PERFORM bump_stat_counter('assets.category', OLD.category::text, -1);
+    ELSE
+        IF OLD.status IS DISTINCT FROM NEW.status THEN
+            PERFORM bump_stat_counter('assets.status', OLD.status::text, -1);
+            PERFORM bump_stat_counter('assets.status', NEW.status::text, 1);
+        END IF;
+        IF OLD.category IS DISTINCT FROM NEW.category THEN
+            PERFORM bump_stat_counter('assets.category', OLD.category::text, -1);
+            PERFORM bump_stat_counter('assets.category', NEW.category::text, 1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS referrals_stats ON referrals;
+CREATE TRIGGER referrals_stats
+    AFTER INSERT OR UPDATE OF status, department, job_id OR DELETE ON referrals
+    FOR EACH ROW
+    EXECUTE FUNCTION maintain_referrals_stats();
+
+DROP TRIGGER IF EXISTS assets_stats ON assets;
+CREATE TRIGGER assets_stats
+    AFTER INSERT OR UPDATE OF status, category OR DELETE ON assets
+    FOR EACH ROW
+    EXECUTE FUNCTION maintain_assets_stats();
+
+-- Backfill from the current rows
+LOCK TABLE referrals, assets IN SHARE MODE;
+DELETE FROM stat_counters;
+INSERT INTO stat_counters (metric, group_key, count)
+SELECT 'referrals.status', COALESCE(status::text, ''), COUNT(*) FROM referrals GROUP BY 2
+UNION ALL
+SELECT 'referrals.department', COALESCE(department::text, ''), COUNT(*) FROM referrals GROUP BY 2
+UNION ALL
+SELECT 'referrals.job_id', COALESCE(job_id::text, ''), COUNT(*) FROM referrals GROUP BY 2
+UNION ALL
+SELECT 'assets.status', COALESCE(status::text, ''), COUNT(*) FROM assets GROUP BY 2
+UNION ALL
+SELECT 'assets.category', COALESCE(category::text, ''), COUNT(*) FROM assets GROUP BY 2;
+
+COMMIT;
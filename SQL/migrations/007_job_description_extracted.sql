@@ -0,0 +1,17 @@
+-- ========================================
+-- EXTRACTED JOB DESCRIPTIONS
+-- Marks job_description_text that the extraction worker copied from
+-- the JD file, so a replaced file overwrites it while typed
+-- descriptions are kept (text_extraction.py).
+-- ========================================
+
+ALTER TABLE job_postings
+    ADD COLUMN IF NOT EXISTS job_description_extracted BOOLEAN DEFAULT FALSE;
+
+-- Text identical to the extraction of the job's current file came from it
+UPDATE job_postings j
+SET job_description_extracted = TRUE
+FROM document_texts d
+WHERE d.file_path = j.job_description_url
+  AND d.status = 'done'
+  AND d.text = j.job_description_text;
@@ -0,0 +1,18 @@
+-- ========================================
+-- REFERRAL LIST KEYSET INDEXES
+-- The referral list pages seek on (created_at, id), newest first,
+-- either over all referrals, one status, or one referrer
+-- (/api/my-referrals). The status and referrer composites make the
+-- single-column ones redundant.
+-- Run outside a transaction (CONCURRENTLY).
+-- ========================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_referrals_created_at_id
+    ON referrals(created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_referrals_status_created_at
+    ON referrals(status, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_referrals_referred_by_created_at
+    ON referrals(referred_by, created_at, id);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_referrals_status;
+DROP INDEX CONCURRENTLY IF EXISTS idx_referrals_referred_by;
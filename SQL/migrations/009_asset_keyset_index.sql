@@ -0,0 +1,8 @@
+-- ========================================
+-- ASSET LIST KEYSET INDEX
+-- The asset list pages seek on (created_at, id), newest first.
+-- Run outside a transaction (CONCURRENTLY).
+-- ========================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_assets_created_at_id
+    ON assets(created_at, id);
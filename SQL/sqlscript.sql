@@ -13,6 +13,7 @@ CREATE SEQUENCE job_postings_seq START WITH 1 INCREMENT BY 1;
 CREATE SEQUENCE referrals_seq START WITH 1 INCREMENT BY 1;
 CREATE SEQUENCE assets_seq START WITH 1 INCREMENT BY 1;
 CREATE SEQUENCE asset_history_seq START WITH 1 INCREMENT BY 1;
+CREATE SEQUENCE document_texts_seq START WITH 1 INCREMENT BY 1;
 
 -- ========================================
 -- USERS TABLE
@@ -64,15 +65,23 @@ CREATE TABLE job_postings (
     is_budgeted BOOLEAN DEFAULT TRUE,
     job_description_url VARCHAR(500),
     job_description_text TEXT,
+    job_description_extracted BOOLEAN DEFAULT FALSE,
     required_skills TEXT,
     created_by INTEGER REFERENCES users(id),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(job_title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(required_skills, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(job_description_text, '')), 'C')
+    ) STORED
 );
 
 CREATE INDEX idx_jobs_status ON job_postings(status);
 CREATE INDEX idx_jobs_department ON job_postings(department);
 CREATE INDEX idx_jobs_created_by ON job_postings(created_by);
+CREATE INDEX idx_jobs_job_description_url ON job_postings(job_description_url);
+CREATE INDEX idx_job_postings_search ON job_postings USING GIN (search_vector);
 
 -- Trigger for job_postings table
 CREATE TRIGGER update_job_postings_updated_at 
@@ -102,13 +111,23 @@ CREATE TABLE referrals (
                          'interview_scheduled', 'selected', 'rejected')),
     notes TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(candidate_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(skills, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(about_candidate, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(notes, '')), 'D')
+    ) STORED
 );
 
 CREATE INDEX idx_referrals_job_id ON referrals(job_id);
-CREATE INDEX idx_referrals_referred_by ON referrals(referred_by);
-CREATE INDEX idx_referrals_status ON referrals(status);
+CREATE INDEX idx_referrals_created_at_id ON referrals(created_at, id);
+CREATE INDEX idx_referrals_status_created_at ON referrals(status, created_at, id);
+CREATE INDEX idx_referrals_referred_by_created_at ON referrals(referred_by, created_at, id);
 CREATE INDEX idx_referrals_candidate_email ON referrals(candidate_email);
+CREATE INDEX idx_referrals_resume_url ON referrals(resume_url);
+CREATE INDEX idx_referrals_candidate_photo_url ON referrals(candidate_photo_url);
+CREATE INDEX idx_referrals_search ON referrals USING GIN (search_vector);
 
 -- Trigger for referrals table
 CREATE TRIGGER update_referrals_updated_at 
@@ -151,6 +170,7 @@ CREATE INDEX idx_assets_serial ON assets(laptop_serial_number);
 CREATE INDEX idx_assets_mac_id ON assets(mac_id);
 CREATE INDEX idx_assets_status ON assets(status);
 CREATE INDEX idx_assets_current_assignee ON assets(current_assignee_user_id);
+CREATE INDEX idx_assets_created_at_id ON assets(created_at, id);
 
 -- Trigger for assets table
 CREATE TRIGGER update_assets_updated_at 
@@ -174,8 +194,164 @@ CREATE TABLE asset_history (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_asset_history_asset_id ON asset_history(asset_id);
-CREATE INDEX idx_asset_history_assignee ON asset_history(assignee_user_id);
+CREATE INDEX idx_asset_history_asset_date ON asset_history(asset_id, assigned_date, id);
+CREATE INDEX idx_asset_history_assignee_date ON asset_history(assignee_user_id, assigned_date, id);
+
+-- ========================================
+-- DOCUMENT TEXTS TABLE
+-- Text extracted from uploaded resumes and JDs by the background
+-- worker, one row per upload blob.
+-- ========================================
+
+CREATE TABLE document_texts (
+    id INTEGER PRIMARY KEY DEFAULT nextval('document_texts_seq'),
+    file_path VARCHAR(500) UNIQUE NOT NULL,
+    kind VARCHAR(30) NOT NULL
+        CHECK (kind IN ('resume', 'job_description')),
+    status VARCHAR(20) DEFAULT 'pending'
+        CHECK (status IN ('pending', 'processing', 'done', 'failed', 'unsupported')),
+    text TEXT,
+    error TEXT,
+    attempts INTEGER DEFAULT 0,
+    claimed_at TIMESTAMP,
+    extracted_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_document_texts_status ON document_texts(status, id);
+
+CREATE TRIGGER update_document_texts_updated_at
+    BEFORE UPDATE ON document_texts
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- ========================================
+-- TABLE VERSIONS
+-- Change counters per table, bumped by statement-level triggers.
+-- List endpoints derive weak ETags from them (table_versions.py).
+-- ========================================
+
+CREATE TABLE table_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO table_versions (table_name, version) VALUES
+    ('users', 0), ('job_postings', 0), ('referrals', 0), ('assets', 0);
+
+CREATE OR REPLACE FUNCTION bump_table_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER bump_users_version
+    AFTER INSERT OR UPDATE OR DELETE ON users
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER bump_job_postings_version
+    AFTER INSERT OR UPDATE OR DELETE ON job_postings
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER bump_referrals_version
+    AFTER INSERT OR UPDATE OR DELETE ON referrals
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER bump_assets_version
+    AFTER INSERT OR UPDATE OR DELETE ON assets
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_table_version();
+
+-- ========================================
+-- DASHBOARD STAT COUNTERS
+-- Row counts per group for /api/stats, kept current by row-level
+-- triggers on referrals and assets (stats.py). Rebuild or verify
+-- with `python stats.py --rebuild` / `--check`.
+-- ========================================
+
+CREATE TABLE stat_counters (
+    metric VARCHAR(100) NOT NULL,
+    group_key VARCHAR(255) NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, group_key)
+);
+
+CREATE OR REPLACE FUNCTION bump_stat_counter(p_metric TEXT, p_group TEXT, p_delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO stat_counters (metric, group_key, count)
+    VALUES (p_metric, COALESCE(p_group, ''), p_delta)
+    ON CONFLICT (metric, group_key) DO UPDATE SET count = stat_counters.count + p_delta;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION maintain_referrals_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_stat_counter('referrals.status', NEW.status::text, 1);
+        PERFORM bump_stat_counter('referrals.department', NEW.department::text, 1);
+        PERFORM bump_stat_counter('referrals.job_id', NEW.job_id::text, 1);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_stat_counter('referrals.status', OLD.status::text, -1);
+        PERFORM bump_stat_counter('referrals.department', OLD.department::text, -1);
+        PERFORM bump_stat_counter('referrals.job_id', OLD.job_id::text, -1);
+    ELSE
+        IF OLD.status IS DISTINCT FROM NEW.status THEN
+            PERFORM bump_stat_counter('referrals.status', OLD.status::text, -1);
+            PERFORM bump_stat_counter('referrals.status', NEW.status::text, 1);
+        END IF;
+        IF OLD.department IS DISTINCT FROM NEW.department THEN
+            PERFORM bump_stat_counter('referrals.department', OLD.department::text, -1);
+            PERFORM bump_stat_counter('referrals.department', NEW.department::text, 1);
+        END IF;
+        IF OLD.job_id IS DISTINCT FROM NEW.job_id THEN
+            PERFORM bump_stat_counter('referrals.job_id', OLD.job_id::text, -1);
+            PERFORM bump_stat_counter('referrals.job_id', NEW.job_id::text, 1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION maintain_assets_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_stat_counter('assets.status', NEW.status::text, 1);
+        PERFORM bump_stat_counter('assets.category', NEW.category::text, 1);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_stat_counter('assets.status', OLD.status::text, -1);
+        PERFORM bump_stat_counter('assets.category', OLD.category::text, -1);
+    ELSE
+        IF OLD.status IS DISTINCT FROM NEW.status THEN
+            PERFORM bump_stat_counter('assets.status', OLD.status::text, -1);
+            PERFORM bump_stat_counter('assets.status', NEW.status::text, 1);
+        END IF;
+        IF OLD.category IS DISTINCT FROM NEW.category THEN
+            PERFORM bump_stat_counter('assets.category', OLD.category::text, -1);
+            PERFORM bump_stat_counter('assets.category', NEW.category::text, 1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER referrals_stats
+    AFTER INSERT OR UPDATE OF status, department, job_id OR DELETE ON referrals
+    FOR EACH ROW
+    EXECUTE FUNCTION maintain_referrals_stats();
+
+CREATE TRIGGER assets_stats
+    AFTER INSERT OR UPDATE OF status, category OR DELETE ON assets
+    FOR EACH ROW
+    EXECUTE FUNCTION maintain_assets_stats();
 
 -- ========================================
 -- INSERT SAMPLE DATA
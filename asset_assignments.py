@@ -0,0 +1,142 @@
+"""
+Transactional asset assign / return workflow.
+
+Every call locks the affected asset rows (SELECT ... FOR UPDATE, in id order
+so concurrent bulk handovers cannot deadlock), rotates the current assignee
+into the previous_assignee_* columns, closes the open asset_history entry and
+appends a new one, all in the caller's transaction. Work is done in a fixed
+number of statements regardless of how many assets are handed over.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from schemas import AssetAssign
+
+UNASSIGNABLE_STATUSES = ("retired", "under_repair")
+
+
+async def _lock_assets(db: AsyncSession, asset_ids: List[int]) -> Dict[int, models.Asset]:
+    if len(set(asset_ids)) != len(asset_ids):
+        raise HTTPException(status_code=400, detail="Each asset may appear only once")
+    assets = (await db.scalars(
+        select(models.Asset)
+        .where(models.Asset.id.in_(asset_ids))
+        .order_by(models.Asset.id)
+        .with_for_update()
+    )).all()
+    found = {asset.id: asset for asset in assets}
+    missing = sorted(set(asset_ids) - set(found))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Assets not found: {missing}")
+    return found
+
+
+async def _close_custody(db: AsyncSession, assets: List[models.Asset], now: datetime, notes: Optional[str]):
+    """End the current assignment of each asset and rotate it to previous_*"""
+    held = [asset for asset in assets if asset.current_assignee_user_id]
+    if not held:
+        return
+    held_ids = [asset.id for asset in held]
+
+    open_ids = set((await db.scalars(
+        select(models.AssetHistory.asset_id).where(
+            models.AssetHistory.asset_id.in_(held_ids),
+            models.AssetHistory.returned_date.is_(None)
+        )
+    )).all())
+    closing = {"returned_date": now}
+    if notes:
+        # Append to whatever was noted at assignment time
+        closing["notes"] = func.coalesce(models.AssetHistory.notes + "\n" + notes, notes)
+    await db.execute(
+        update(models.AssetHistory)
+        .where(models.AssetHistory.asset_id.in_(held_ids), models.AssetHistory.returned_date.is_(None))
+        .values(**closing)
+    )
+
+    # Assignments made before this workflow existed have no history row yet.
+    # assigned_date is the timeline's sort key, so it is never left empty.
+    backfill = [
+        {
+            "asset_id": asset.id,
+            "assignee_name": asset.current_assignee_name,
+            "assignee_user_id": asset.current_assignee_user_id,
+            "assignee_email": asset.current_assignee_email,
+            "assigned_date": asset.assigned_date or asset.created_at or now,
+            "returned_date": now,
+            "notes": notes,
+            "created_at": now,
+        }
+        for asset in held if asset.id not in open_ids
+    ]
+    if backfill:
+        await db.execute(insert(models.AssetHistory), backfill)
+
+    for asset in held:
+        asset.previous_assignee_name = asset.current_assignee_name
+        asset.previous_assignee_user_id = asset.current_assignee_user_id
+        asset.previous_assignee_date = now
+
+
+async def assign_assets(db: AsyncSession, assignments: List[Tuple[int, AssetAssign]]) -> List[models.Asset]:
+    """Hand each asset to its new assignee; the caller commits"""
+    assets = await _lock_assets(db, [asset_id for asset_id, _ in assignments])
+
+    conflicts = []
+    for asset_id, target in assignments:
+        asset = assets[asset_id]
+        if asset.status in UNASSIGNABLE_STATUSES:
+            conflicts.append(f"{asset_id}: asset is {asset.status}")
+        elif asset.current_assignee_user_id == target.current_assignee_user_id:
+            conflicts.append(f"{asset_id}: already assigned to {target.current_assignee_user_id}")
+    if conflicts:
+        raise HTTPException(status_code=409, detail=conflicts)
+
+    now = datetime.utcnow()
+    await _close_custody(db, list(assets.values()), now, notes=None)
+
+    history = []
+    for asset_id, target in assignments:
+        asset = assets[asset_id]
+        asset.current_assignee_name = target.current_assignee_name
+        asset.current_assignee_user_id = target.current_assignee_user_id
+        asset.current_assignee_email = target.current_assignee_email
+        asset.assigned_date = now
+        asset.status = "assigned"
+        history.append({
+            "asset_id": asset_id,
+            "assignee_name": target.current_assignee_name,
+            "assignee_user_id": target.current_assignee_user_id,
+            "assignee_email": target.current_assignee_email,
+            "assigned_date": now,
+            "notes": target.notes,
+            "created_at": now,
+        })
+    await db.execute(insert(models.AssetHistory), history)
+    return list(assets.values())
+
+
+async def return_assets(db: AsyncSession, asset_ids: List[int], notes: Optional[str]) -> List[models.Asset]:
+    """Take each asset back from its assignee; the caller commits"""
+    assets = await _lock_assets(db, asset_ids)
+
+    unassigned = [asset_id for asset_id, asset in assets.items() if not asset.current_assignee_user_id]
+    if unassigned:
+        raise HTTPException(status_code=409, detail=f"Assets not currently assigned: {sorted(unassigned)}")
+
+    now = datetime.utcnow()
+    await _close_custody(db, list(assets.values()), now, notes)
+
+    for asset in assets.values():
+        asset.current_assignee_name = None
+        asset.current_assignee_user_id = None
+        asset.current_assignee_email = None
+        asset.assigned_date = None
+        asset.status = "available"
+    return list(assets.values())
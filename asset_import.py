@@ -0,0 +1,284 @@
+"""
+Bulk asset import from CSV or JSONL.
+
+Rows are streamed, validated against schemas.AssetCreate and upserted on
+laptop_serial_number with one multi-row INSERT ... ON CONFLICT per batch
+(per distinct set of columns, when rows in a batch provide different ones).
+An update only touches the columns a row actually provides, so re-importing
+a shipment list never resets status or notes set since.
+Rows that fail validation, collide with another asset's mac_id, or make the
+batch statement fail are reported per line; the rest of the batch still lands.
+Each batch is committed on its own, so memory and transaction size stay flat
+regardless of file size.
+
+CSV input is read line by line, so quoted fields must not contain newlines.
+
+    python asset_import.py laptops.csv
+    python asset_import.py laptops.jsonl --batch-size 2000
+"""
+
+import codecs
+import csv
+import json
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Iterator, List, Optional
+
+from fastapi import UploadFile
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import models
+from schemas import AssetCreate
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# Same values as the CHECK constraints in SQL/sqlscript.sql
+ASSET_CATEGORIES = {"laptop", "desktop", "monitor", "mouse", "keyboard", "headphones", "charger", "other"}
+ASSET_STATUSES = {"available", "assigned", "under_repair", "retired"}
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return None
+
+
+class AssetImport:
+    """Per-import state: parsing position, batch preparation, writes and the report"""
+
+    def __init__(self, fmt: str, dialect_name: str):
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+        self.fmt = fmt
+        self.dialect_name = dialect_name
+        self.csv_header = None
+        self.line_no = 0
+        self.processed = 0
+        self.upserted = 0
+        self.failed = 0
+        self.errors = []
+
+    # ---------- parsing and validation ----------
+
+    def _parse(self, lines: List[str]) -> Iterator[tuple]:
+        if self.fmt == "jsonl":
+            for line in lines:
+                self.line_no += 1
+                if line.strip():
+                    yield self.line_no, line
+            return
+        for fields in csv.reader(lines):
+            self.line_no += 1
+            if not fields:
+                continue
+            if self.csv_header is None:
+                self.csv_header = [field.strip() for field in fields]
+                continue
+            yield self.line_no, dict(zip(self.csv_header, fields))
+
+    def _validate(self, raw) -> dict:
+        record = json.loads(raw) if isinstance(raw, str) else raw
+        if not isinstance(record, dict):
+            raise ValueError("Row must be an object")
+        # Empty CSV cells mean "not provided"
+        record = {key: value for key, value in record.items() if value not in ("", None)}
+        asset = AssetCreate(**record)
+        if asset.category not in ASSET_CATEGORIES:
+            raise ValueError(f"Unknown category: {asset.category}")
+        if asset.status not in ASSET_STATUSES:
+            raise ValueError(f"Unknown status: {asset.status}")
+        return asset.model_dump(exclude_unset=True)
+
+    def record_error(self, line: int, error, serial: Optional[str] = None):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            if isinstance(error, ValidationError):
+                message = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+            else:
+                message = str(getattr(error, "orig", error)).strip().splitlines()[0]
+            self.errors.append({"line": line, "serial_number": serial, "error": message})
+
+    def prepare(self, lines: List[str]) -> List[tuple]:
+        """Parse and validate a batch of lines into (line, row) pairs.
+
+        A serial appearing twice in a batch keeps its last row, since one
+        INSERT ... ON CONFLICT cannot update the same row twice.
+        """
+        by_serial = {}
+        for line, raw in self._parse(lines):
+            self.processed += 1
+            try:
+                row = self._validate(raw)
+            except (ValidationError, ValueError, TypeError) as exc:
+                self.record_error(line, exc, raw.get("laptop_serial_number") if isinstance(raw, dict) else None)
+                continue
+            serial = row["laptop_serial_number"]
+            if serial in by_serial:
+                self.record_error(by_serial[serial][0], "Superseded by a later row with the same serial", serial)
+            by_serial[serial] = (line, row)
+        return list(by_serial.values())
+
+    # ---------- mac_id conflicts ----------
+
+    def mac_owner_query(self, batch: List[tuple]):
+        macs = [row["mac_id"] for _, row in batch if row.get("mac_id")]
+        return select(models.Asset.mac_id, models.Asset.laptop_serial_number).where(
+            models.Asset.mac_id.in_(macs)
+        )
+
+    def drop_mac_conflicts(self, batch: List[tuple], owners: Iterable[tuple]) -> List[tuple]:
+        """Reject rows whose mac_id belongs to a different serial"""
+        mac_owner = dict(owners)
+        kept = []
+        for line, row in batch:
+            mac, serial = row.get("mac_id"), row["laptop_serial_number"]
+            if mac and mac_owner.setdefault(mac, serial) != serial:
+                self.record_error(line, f"mac_id {mac} already belongs to {mac_owner[mac]}", serial)
+                continue
+            kept.append((line, row))
+        return kept
+
+    # ---------- writes ----------
+
+    def upsert_statements(self, batch: List[tuple]) -> list:
+        """One multi-row upsert per distinct set of provided columns"""
+        dialect = postgresql if self.dialect_name == "postgresql" else sqlite
+        now = datetime.utcnow()
+        groups = {}
+        for _, row in batch:
+            groups.setdefault(frozenset(row), []).append({**row, "created_at": now, "updated_at": now})
+
+        statements = []
+        for columns, rows in groups.items():
+            stmt = dialect.insert(models.Asset).values(rows)
+            updated = {name: stmt.excluded[name] for name in columns if name != "laptop_serial_number"}
+            statements.append(stmt.on_conflict_do_update(
+                index_elements=[models.Asset.laptop_serial_number],
+                set_={**updated, "updated_at": now},
+            ))
+        return statements
+
+    def record_success(self, batch: List[tuple]):
+        self.upserted += len(batch)
+
+    def write(self, db: Session, batch: List[tuple]):
+        """Upsert a prepared batch; rows that make the batch fail are retried one by one.
+
+        Does not commit. The async import calls it through AsyncSession.run_sync.
+        """
+        batch = self.drop_mac_conflicts(batch, db.execute(self.mac_owner_query(batch)).all())
+        if not batch:
+            return
+        try:
+            with db.begin_nested():
+                for stmt in self.upsert_statements(batch):
+                    db.execute(stmt)
+            self.record_success(batch)
+        except DBAPIError:
+            # Isolate the offending rows and keep the rest
+            for line, row in batch:
+                try:
+                    with db.begin_nested():
+                        db.execute(self.upsert_statements([(line, row)])[0])
+                    self.record_success([(line, row)])
+                except DBAPIError as exc:
+                    self.record_error(line, exc, row["laptop_serial_number"])
+
+    def report(self) -> dict:
+        return {
+            "processed": self.processed,
+            "upserted": self.upserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+# ============================================
+# EXECUTION
+# ============================================
+
+def _batched(lines: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def iter_upload_lines(upload_file: UploadFile, chunk_size: int = 64 * 1024) -> AsyncIterator[str]:
+    """Decode an upload incrementally and yield it line by line"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    while chunk := await upload_file.read(chunk_size):
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def import_assets_async(
+    db: AsyncSession, lines: AsyncIterator[str], fmt: str, batch_size: int = IMPORT_BATCH_SIZE
+) -> dict:
+    job = AssetImport(fmt, db.get_bind().dialect.name)
+
+    async def write(batch):
+        await db.run_sync(job.write, batch)
+        await db.commit()
+
+    batch_lines = []
+    async for line in lines:
+        batch_lines.append(line)
+        if len(batch_lines) >= batch_size:
+            await write(job.prepare(batch_lines))
+            batch_lines = []
+    if batch_lines:
+        await write(job.prepare(batch_lines))
+    return job.report()
+
+
+def import_assets(db: Session, lines: Iterable[str], fmt: str, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    job = AssetImport(fmt, db.get_bind().dialect.name)
+    for batch_lines in _batched(lines, batch_size):
+        job.write(db, job.prepare(batch_lines))
+        db.commit()
+    return job.report()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Bulk import assets from CSV or JSONL")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS)
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("Cannot tell the format from the file name, pass --format")
+
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as source:
+            report = import_assets(db, source, fmt, args.batch_size)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
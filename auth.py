@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 
 from database import get_db
 from models import User
+from principal_cache import Principal, principal_cache
 from schemas import TokenData
 
 load_dotenv()
@@ -52,12 +53,17 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == token_data.email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    principal = principal_cache.get(token_data.email)
+    if principal is None:
+        generation = principal_cache.generation(token_data.email)
+        user = db.query(User).filter(User.email == token_data.email).first()
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.put(token_data.email, principal, generation)
+    return principal
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+def get_current_active_user(current_user: Principal = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Database work per poll of the list endpoints, with and without conditional GET.
+
+Each endpoint is polled repeatedly by a client that either ignores ETags or
+replays the last one in If-None-Match, while the data does not change. SQL
+statements and rows fetched are counted on the engine, so the numbers show
+how much of the list query a 304 skips.
+
+    python -m benchmarks.bench_conditional_get --polls 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_conditional_get_")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/bench.db"
+os.environ["EXTRACTION_ENABLED"] = "0"
+os.chdir(WORKDIR)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import CursorResult  # noqa: E402
+
+import database  # noqa: E402
+import main  # noqa: E402
+import models  # noqa: E402
+
+COUNTERS = {"statements": 0, "rows": 0}
+
+
+def seed(jobs: int = 100, referrals: int = 2000, assets: int = 1000):
+    database.Base.metadata.create_all(database.engine)
+    db = database.SessionLocal()
+    user = models.User(email="bench@company.com", full_name="Bench", hashed_password="x", role="admin")
+    db.add(user)
+    db.flush()
+    db.add_all(
+        models.JobPosting(job_title=f"Job {i}", department="Engineering", created_by=user.id)
+        for i in range(jobs)
+    )
+    db.flush()
+    db.add_all(
+        models.Referral(job_id=(i % jobs) + 1, candidate_name=f"Candidate {i}",
+                        candidate_email=f"c{i}@example.com", referred_by=user.id)
+        for i in range(referrals)
+    )
+    db.add_all(
+        models.Asset(laptop_serial_number=f"SN{i:06d}", mac_id=f"MAC{i:06d}", category="laptop")
+        for i in range(assets)
+    )
+    db.commit()
+    db.close()
+
+
+def install_counters():
+    @event.listens_for(database.async_engine.sync_engine, "after_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        COUNTERS["statements"] += 1
+
+    # Rows are counted where results are pulled from the DBAPI cursor
+    original_fetchall = CursorResult._fetchall_impl
+
+    def counting_fetchall(self):
+        rows = original_fetchall(self)
+        COUNTERS["rows"] += len(rows)
+        return rows
+
+    CursorResult._fetchall_impl = counting_fetchall
+
+
+async def poll(client: httpx.AsyncClient, path: str, polls: int, conditional: bool, headers: dict) -> dict:
+    COUNTERS.update(statements=0, rows=0)
+    etag = None
+    transferred = 0
+    not_modified = 0
+    started = time.perf_counter()
+    for _ in range(polls):
+        request_headers = dict(headers)
+        if conditional and etag:
+            request_headers["If-None-Match"] = etag
+        response = await client.get(path, headers=request_headers)
+        if response.status_code == 304:
+            not_modified += 1
+        else:
+            response.raise_for_status()
+            etag = response.headers.get("etag")
+        transferred += len(response.content)
+    elapsed = time.perf_counter() - started
+    return {
+        "statements_per_poll": round(COUNTERS["statements"] / polls, 2),
+        "rows_per_poll": round(COUNTERS["rows"] / polls, 1),
+        "bytes_per_poll": round(transferred / polls),
+        "ms_per_poll": round(elapsed / polls * 1000, 2),
+        "not_modified": not_modified,
+    }
+
+
+async def run(args) -> list:
+    token = main.create_access_token({"sub": "bench@company.com"})
+    headers = {"Authorization": f"Bearer {token}"}
+    results = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/api/jobs", "/api/referrals?limit=500", "/api/assets?limit=500"):
+            results.append({
+                "path": path,
+                "unconditional": await poll(client, path, args.polls, False, headers),
+                "conditional": await poll(client, path, args.polls, True, headers),
+            })
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--polls", type=int, default=200)
+    args = parser.parse_args()
+
+    seed()
+    install_counters()
+    results = asyncio.run(run(args))
+    print(json.dumps({"polls": args.polls, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
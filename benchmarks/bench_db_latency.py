@@ -0,0 +1,130 @@
+"""
+Concurrent-request throughput as database latency grows.
+
+Compares the async handlers in main.py against the old pattern of calling a
+synchronous Session from inside an ``async def`` handler. Latency is injected
+per statement: the async path awaits it (as asyncpg would wait on the socket),
+the blocking path sleeps the thread (as psycopg2 does).
+
+    python -m benchmarks.bench_db_latency --concurrency 20 --requests 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_db_latency_")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/bench.db"
+os.chdir(WORKDIR)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiosqlite  # noqa: E402
+import httpx  # noqa: E402
+from sqlalchemy import event, func  # noqa: E402
+
+import database  # noqa: E402
+import main  # noqa: E402
+import models  # noqa: E402
+
+LATENCY = {"seconds": 0.0}
+
+
+def seed(jobs: int = 50, referrals: int = 500):
+    database.Base.metadata.create_all(database.engine)
+    db = database.SessionLocal()
+    user = models.User(email="bench@company.com", full_name="Bench", hashed_password="x", role="admin")
+    db.add(user)
+    db.flush()
+    db.add_all(
+        models.JobPosting(job_title=f"Job {i}", department="Engineering", created_by=user.id)
+        for i in range(jobs)
+    )
+    db.flush()
+    db.add_all(
+        models.Referral(job_id=(i % jobs) + 1, candidate_name=f"Candidate {i}",
+                        candidate_email=f"c{i}@example.com", referred_by=user.id)
+        for i in range(referrals)
+    )
+    db.commit()
+    db.close()
+
+
+def install_latency():
+    original_execute = aiosqlite.Cursor.execute
+
+    async def delayed_execute(self, *args, **kwargs):
+        if LATENCY["seconds"]:
+            await asyncio.sleep(LATENCY["seconds"])
+        return await original_execute(self, *args, **kwargs)
+
+    aiosqlite.Cursor.execute = delayed_execute
+
+    @event.listens_for(database.engine, "before_cursor_execute")
+    def blocking_delay(*args):
+        if LATENCY["seconds"]:
+            time.sleep(LATENCY["seconds"])
+
+
+@main.app.get("/bench/blocking-jobs")
+async def blocking_jobs():
+    """The pre-async shape of GET /api/jobs: same statements, sync Session"""
+    db = database.SessionLocal()
+    try:
+        db.query(models.User).filter(models.User.email == "bench@company.com").first()
+        db.query(func.count(models.JobPosting.id)).scalar()
+        jobs = db.query(models.JobPosting).order_by(models.JobPosting.id.desc()).limit(100).all()
+        db.query(models.Referral.job_id, func.count(models.Referral.id)).filter(
+            models.Referral.job_id.in_([job.id for job in jobs])
+        ).group_by(models.Referral.job_id).all()
+        return {"count": len(jobs)}
+    finally:
+        db.close()
+
+
+async def drive(path: str, concurrency: int, total: int, headers: dict) -> float:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get(path, headers=headers)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+async def run(args) -> list:
+    token = main.create_access_token({"sub": "bench@company.com"})
+    headers = {"Authorization": f"Bearer {token}"}
+    results = []
+    for latency_ms in args.latencies:
+        LATENCY["seconds"] = latency_ms / 1000
+        row = {"latency_ms": latency_ms}
+        for name, path in (("async", "/api/jobs"), ("blocking", "/bench/blocking-jobs")):
+            row[f"{name}_rps"] = round(await drive(path, args.concurrency, args.requests, headers), 1)
+        results.append(row)
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latencies", type=float, nargs="+", default=[0, 2, 10, 25])
+    args = parser.parse_args()
+
+    seed()
+    install_latency()
+    results = asyncio.run(run(args))
+    print(json.dumps({"concurrency": args.concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
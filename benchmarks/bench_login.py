@@ -0,0 +1,119 @@
+"""
+Login throughput with bcrypt on the hashing pool vs. on the event loop.
+
+Drives POST /api/auth/login with concurrent clients while a probe keeps
+calling GET /api/health, and reports login throughput plus the probe's
+latency. With hashing on the event loop the probe waits behind every bcrypt
+call; with the pool it stays fast.
+
+    python -m benchmarks.bench_login --concurrency 16 --requests 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_login_")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/bench.db"
+os.chdir(WORKDIR)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from fastapi import Depends, Form, HTTPException  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+import database  # noqa: E402
+import main  # noqa: E402
+import models  # noqa: E402
+from hashing import pwd_context  # noqa: E402
+
+PASSWORD = "bench-password"
+
+
+def seed(users: int):
+    database.Base.metadata.create_all(database.engine)
+    hashed = pwd_context.hash(PASSWORD)
+    db = database.SessionLocal()
+    db.add_all(
+        models.User(email=f"user{i}@company.com", full_name=f"User {i}", hashed_password=hashed)
+        for i in range(users)
+    )
+    db.commit()
+    db.close()
+
+
+@main.app.post("/bench/blocking-login")
+async def blocking_login(username: str = Form(...), password: str = Form(...), db=Depends(database.get_async_db)):
+    """The previous login shape: bcrypt verify directly on the event loop"""
+    user = await db.scalar(select(models.User).where(models.User.email == username))
+    if not user or not pwd_context.verify(password, user.hashed_password):
+        raise HTTPException(status_code=401)
+    return {"access_token": main.create_access_token({"sub": user.email}), "token_type": "bearer"}
+
+
+async def drive(path: str, concurrency: int, total: int, users: int) -> dict:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        remaining = iter(range(total))
+        probe_latencies = []
+        done = asyncio.Event()
+
+        async def worker():
+            for i in remaining:
+                form = {"username": f"user{i % users}@company.com", "password": PASSWORD}
+                response = await client.post(path, data=form)
+                response.raise_for_status()
+
+        async def probe():
+            # Measured from when the probe was due, so time spent waiting for
+            # a blocked event loop counts against it
+            while not done.is_set():
+                due = time.perf_counter() + 0.01
+                await asyncio.sleep(0.01)
+                await client.get("/api/health")
+                probe_latencies.append((time.perf_counter() - due) * 1000)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+        return {
+            "logins_per_sec": round(total / elapsed, 1),
+            "probe_p50_ms": round(statistics.median(probe_latencies), 1),
+            "probe_max_ms": round(max(probe_latencies), 1),
+        }
+
+
+async def run(args) -> dict:
+    return {
+        "pool": await drive("/api/auth/login", args.concurrency, args.requests, args.users),
+        "event_loop": await drive("/bench/blocking-login", args.concurrency, args.requests, args.users),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--users", type=int, default=16)
+    args = parser.parse_args()
+
+    seed(args.users)
+    results = asyncio.run(run(args))
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "hash_pool": main.hashing_pool.stats(),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,171 @@
+"""
+Serialization cost of 10k-row list responses, untyped versus typed.
+
+The same rows (built by the real main.*_to_dict helpers from in-memory ORM
+objects, so no database time is included) are serialized three ways:
+
+- untyped: plain dicts with no response_model, the old path, where FastAPI
+  runs jsonable_encoder over every value and then json.dumps
+- untyped_orjson: the same through ORJSONResponse (only if orjson is
+  installed); jsonable_encoder still runs, only the final dump is faster
+- typed: the schemas.*Response models the endpoints now declare, which
+  FastAPI validates and dumps to JSON bytes in pydantic-core
+
+serialize_ms times only the body production FastAPI does per response;
+request_ms is a full request through the ASGI stack to the same routes, which
+adds a fixed transport cost on top. All bodies are checked to decode to the
+same JSON.
+
+    python -m benchmarks.bench_serialization --rows 10000 --repeat 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+from typing import List
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_serialization_")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/bench.db"
+os.environ["EXTRACTION_ENABLED"] = "0"
+os.chdir(WORKDIR)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+import main  # noqa: E402
+import models  # noqa: E402
+import schemas  # noqa: E402
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse
+except ImportError:
+    ORJSONResponse = None
+
+RESPONSE_MODELS = {
+    "jobs": schemas.JobResponse,
+    "referrals": schemas.ReferralResponse,
+    "assets": schemas.AssetResponse,
+}
+
+
+def build_rows(count: int) -> dict:
+    base = datetime(2024, 1, 1, 9, 30, 15, 123456)
+    jobs, referrals, assets = [], [], []
+    for i in range(count):
+        created = base + timedelta(minutes=i)
+        job = models.JobPosting(
+            id=i + 1, job_title=f"Senior Engineer {i}", department="Engineering", experience_range="5-7",
+            status="open", job_description_text="Build and run services. " * 4,
+            required_skills='["python", "sql", "aws"]', created_by=1, created_at=created, updated_at=created,
+        )
+        referral = models.Referral(
+            id=i + 1, job_id=i + 1, candidate_name=f"Candidate {i}", candidate_email=f"c{i}@example.com",
+            candidate_phone="+1 555 0100", department="Engineering", experience="6 years",
+            skills='["python", "sql"]', about_candidate="Strong backend engineer.", referred_by=1,
+            resume_url=f"uploads/resumes/{i:064x}.pdf", candidate_photo_url=f"uploads/photos/{i:064x}.jpg",
+            status="submitted", created_at=created, updated_at=created,
+        )
+        referral.job = job
+        asset = models.Asset(
+            id=i + 1, laptop_serial_number=f"SN{i:06d}", charger_number=f"CH{i:06d}", category="laptop",
+            status="assigned", current_assignee_user_id=str(i % 500), current_assignee_name=f"Employee {i % 500}",
+            procurement_date=created, warranty_expiry=created + timedelta(days=1095),
+            created_at=created, updated_at=created,
+        )
+        jobs.append(main.job_to_dict(job, i % 7))
+        referrals.append(main.referral_to_dict(referral))
+        assets.append(main.asset_to_dict(asset, "Engineering"))
+    return {"jobs": jobs, "referrals": referrals, "assets": assets}
+
+
+def serializers(name: str) -> dict:
+    """Body producers for each variant, the same calls FastAPI makes per response"""
+    field = APIRoute(f"/{name}", lambda: None, response_model=List[RESPONSE_MODELS[name]]).response_field
+
+    async def untyped(payload):
+        return JSONResponse(jsonable_encoder(payload)).body
+
+    async def untyped_orjson(payload):
+        return ORJSONResponse(jsonable_encoder(payload)).body
+
+    async def typed(payload):
+        return await serialize_response(field=field, response_content=payload, dump_json=True)
+
+    variants = {"untyped": untyped, "typed": typed}
+    if ORJSONResponse is not None:
+        variants["untyped_orjson"] = untyped_orjson
+    return variants
+
+
+def build_app(rows: dict) -> FastAPI:
+    app = FastAPI()
+    for name, payload in rows.items():
+        async def handler(payload=payload):
+            return payload
+        app.add_api_route(f"/untyped/{name}", handler)
+        app.add_api_route(f"/typed/{name}", handler, response_model=List[RESPONSE_MODELS[name]])
+        if ORJSONResponse is not None:
+            app.add_api_route(f"/untyped_orjson/{name}", handler, response_class=ORJSONResponse)
+    return app
+
+
+async def median_seconds(call, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call()
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2]
+
+
+async def run(args) -> dict:
+    rows = build_rows(args.rows)
+    app = build_app(rows)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, payload in rows.items():
+            results[name] = {}
+            bodies = []
+            for variant, serialize in serializers(name).items():
+                body = await serialize(payload)
+                bodies.append(json.loads(body))
+                serialize_seconds = await median_seconds(lambda: serialize(payload), args.repeat)
+                request_seconds = await median_seconds(lambda: client.get(f"/{variant}/{name}"), args.repeat)
+                results[name][variant] = {
+                    "serialize_ms": round(serialize_seconds * 1000, 1),
+                    "serialize_us_per_row": round(serialize_seconds / args.rows * 1e6, 2),
+                    "request_ms": round(request_seconds * 1000, 1),
+                    "bytes": len(body),
+                }
+            assert all(body == bodies[0] for body in bodies), f"{name}: variants returned different JSON"
+            results[name]["typed_serialize_speedup"] = round(
+                results[name]["untyped"]["serialize_ms"] / results[name]["typed"]["serialize_ms"], 2
+            )
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", message="ORJSONResponse is deprecated")
+    results = asyncio.run(run(args))
+    print(json.dumps({"rows": args.rows, "repeat": args.repeat, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,90 @@
+"""
+Garbage-collect upload blobs that no row references any more.
+
+Scans uploads/resumes, uploads/photos and uploads/job_descriptions, checks
+candidates against resume_url / candidate_photo_url / job_description_url in
+batches, and deletes the unreferenced ones. Blobs written or reused within the
+grace period are kept so in-flight uploads are never removed. Extracted text
+rows of deleted blobs are removed with them.
+
+    python gc_uploads.py --dry-run
+    python gc_uploads.py --batch-size 1000 --grace-seconds 3600
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import delete
+
+import models
+from database import SessionLocal
+from uploads import (
+    JOB_DESCRIPTIONS_DIR, PHOTOS_DIR, RESUMES_DIR, TEMP_SUFFIX, UPLOAD_GC_GRACE_SECONDS,
+    delete_blob_if_stale, referenced_paths_query
+)
+
+
+def iter_candidate_batches(grace_seconds: int, batch_size: int):
+    """Yield batches of blob paths older than the grace period"""
+    cutoff = time.time() - grace_seconds
+    batch = []
+    for directory in (RESUMES_DIR, PHOTOS_DIR, JOB_DESCRIPTIONS_DIR):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.stat().st_mtime >= cutoff:
+                    continue
+                batch.append(str(directory / entry.name))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def collect_garbage(batch_size: int, grace_seconds: int, dry_run: bool) -> dict:
+    totals = {"scanned": 0, "referenced": 0, "deleted": 0, "bytes_freed": 0}
+    db = SessionLocal()
+    try:
+        for batch in iter_candidate_batches(grace_seconds, batch_size):
+            totals["scanned"] += len(batch)
+
+            # Interrupted uploads are never referenced
+            temp_files = [path for path in batch if path.endswith(TEMP_SUFFIX)]
+            blobs = [path for path in batch if not path.endswith(TEMP_SUFFIX)]
+            referenced = set(db.execute(referenced_paths_query(blobs)).scalars()) if blobs else set()
+            totals["referenced"] += len(referenced)
+
+            deleted = []
+            for path in temp_files + [path for path in blobs if path not in referenced]:
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                if dry_run:
+                    print(f"  would delete {path}")
+                elif delete_blob_if_stale(path, grace_seconds):
+                    deleted.append(path)
+                    totals["deleted"] += 1
+                    totals["bytes_freed"] += size
+
+            # Extracted text goes with its blob
+            if deleted:
+                db.execute(delete(models.DocumentText).where(models.DocumentText.file_path.in_(deleted)))
+                db.commit()
+
+            print(f"✓ Batch of {len(batch)}: {len(referenced)} referenced, {totals['deleted']} deleted so far")
+    finally:
+        db.close()
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete unreferenced upload blobs")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--grace-seconds", type=int, default=UPLOAD_GC_GRACE_SECONDS)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    print("Collecting unreferenced uploads...")
+    print("-" * 50)
+    totals = collect_garbage(args.batch_size, args.grace_seconds, args.dry_run)
+    print("-" * 50)
+    print(f"✅ Scanned {totals['scanned']} files, kept {totals['referenced']} referenced, "
+          f"deleted {totals['deleted']} ({totals['bytes_freed']} bytes)")
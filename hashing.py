@@ -0,0 +1,77 @@
+"""
+Password hashing on a bounded worker pool.
+
+bcrypt costs 100-300 ms of CPU per call. Running it inside an ``async def``
+handler stalls every other request on the worker, so hashing and verification
+are handed to a small thread pool (bcrypt releases the GIL while it works).
+When more than HASH_POOL_MAX_PENDING calls are waiting, new ones are rejected
+with 503 instead of piling up behind the pool.
+
+BCRYPT_ROUNDS sets the cost factor of new hashes. Hashes made with another
+cost still verify, and login replaces them on the next successful sign-in
+(verify_and_update), so a cost change rolls out without a bulk rehash.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", "64"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class HashingPool:
+    """Size-limited executor for password hashing with queue backpressure"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwd-hash")
+
+    async def _run(self, fn, *args):
+        # Only touched from the event loop thread, so no lock is needed
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(valid, replacement hash or None); the replacement is set when needs_update flags the stored hash"""
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+hashing_pool = HashingPool(HASH_POOL_WORKERS, HASH_POOL_MAX_PENDING)
@@ -1,22 +1,42 @@
 from fastapi import File, UploadFile, Form  # ✅ FIXED: Added Form here
-from pathlib import Path
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-import shutil
-import uuid
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, status, Query, Request, Response, BackgroundTasks
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import String, cast, func, select
 from datetime import datetime, timedelta
 from typing import Optional, List
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr, ConfigDict  # ✅ FIXED: Added ConfigDict
 import os
 
 # Database imports
-from database import SessionLocal, engine
+from database import async_engine, engine, get_async_db
+from hashing import hashing_pool
+from pool_metrics import pool_stats, probe_database
+from metrics import MetricsMiddleware, instrument_statements, pool_collector, registry
+from query_budget import QUERY_BUDGET_MODE, QueryBudgetMiddleware, query_budget, trace_statements
+from principal_cache import Principal, principal_cache
+from uploads import (
+    JOB_DESCRIPTIONS_DIR, MAX_IMPORT_REQUEST_BYTES, MAX_JOB_DESCRIPTION_BYTES, MAX_PHOTO_BYTES, MAX_RESUME_BYTES,
+    PHOTOS_DIR, RESUMES_DIR, UploadSizeLimitMiddleware, file_download_response, release_upload,
+    save_upload_file
+)
+from pagination import apply_keyset, encode_cursor, split_page
+from asset_import import IMPORT_FORMATS, detect_format, import_assets_async, iter_upload_lines
+from asset_assignments import assign_assets, return_assets
+from search import search_jobs, search_referrals
+from matching import parse_skills, skill_index
+from text_extraction import EXTRACTION_ENABLED, extraction_worker, queue_extraction
+from photo_variants import THUMBNAIL_SIZE, pick_format, pick_size, variant_cache
+from stats import get_stats
+from table_versions import (
+    ASSET_LIST_TABLES, JOB_LIST_TABLES, REFERRAL_LIST_TABLES, conditional_get_stats, conditional_list
+)
+import schemas
 import models
 
 # JWT Settings
@@ -24,27 +44,25 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
 
-# Create uploads directory
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-
-# Subdirectories
-RESUMES_DIR = UPLOAD_DIR / "resumes"
-PHOTOS_DIR = UPLOAD_DIR / "photos"
-JOB_DESCRIPTIONS_DIR = UPLOAD_DIR / "job_descriptions"
-
-RESUMES_DIR.mkdir(exist_ok=True)
-PHOTOS_DIR.mkdir(exist_ok=True)
-JOB_DESCRIPTIONS_DIR.mkdir(exist_ok=True)
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if EXTRACTION_ENABLED:
+        await extraction_worker.start()
+    yield
+    await extraction_worker.stop()
+    hashing_pool.shutdown()
+
 # Create FastAPI app
-app = FastAPI(title="Employee Portal API")
+app = FastAPI(title="Employee Portal API", lifespan=lifespan)
+
+# Reject oversized uploads before they are spooled (added first so CORS wraps it)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    path_limits={"/api/assets/import": MAX_IMPORT_REQUEST_BYTES}
+)
 
 # CORS configuration
 app.add_middleware(
@@ -60,16 +78,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ============================================
-# DATABASE DEPENDENCY
-# ============================================
+# Development / test only: per-request statement tracing and query budgets
+if QUERY_BUDGET_MODE != "off":
+    app.add_middleware(QueryBudgetMiddleware)
+    trace_statements(async_engine.sync_engine)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Outermost, so rejected uploads and CORS preflights are measured too
+app.add_middleware(MetricsMiddleware)
+instrument_statements(engine)
+instrument_statements(async_engine.sync_engine)
+registry.add_collector(pool_collector(async_engine.sync_engine, "api"))
 
 # ============================================
 # PYDANTIC MODELS
@@ -86,6 +104,12 @@ class UserCreate(BaseModel):
     role: str = "employee"
     department: Optional[str] = None
 
+class UserUpdate(BaseModel):
+    full_name: Optional[str] = None
+    role: Optional[str] = None
+    department: Optional[str] = None
+    is_active: Optional[bool] = None
+
 class UserResponse(BaseModel):
     id: int
     email: str
@@ -98,34 +122,17 @@ class UserResponse(BaseModel):
     # ✅ FIXED: Use ConfigDict instead of class Config
     model_config = ConfigDict(from_attributes=True)
         
-# Helper function to save uploaded file
-def save_upload_file(upload_file: UploadFile, directory: Path) -> str:
-    """Save uploaded file and return the file path"""
-    try:
-        # Generate unique filename
-        file_extension = Path(upload_file.filename).suffix
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = directory / unique_filename
-        
-        # Save file
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
-        
-        return str(file_path)
-    finally:
-        upload_file.file.close()
-
 # ============================================
 # AUTHENTICATION UTILITIES
 # ============================================
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Verify a password; also return a new hash if the stored one uses outdated settings"""
+    return await hashing_pool.verify_and_update(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    return await hashing_pool.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
@@ -140,7 +147,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user from JWT token"""
     credentials_exception = HTTPException(
@@ -157,11 +164,22 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if user is None:
-        raise credentials_exception
+    principal = principal_cache.get(email)
+    if principal is None:
+        generation = principal_cache.generation(email)
+        user = await db.scalar(select(models.User).where(models.User.email == email))
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.put(email, principal, generation)
     
-    return user
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+    
+    return principal
 
 # ============================================
 # AUTH ENDPOINTS
@@ -170,14 +188,17 @@ async def get_current_user(
 @app.post("/api/auth/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login endpoint"""
-    user = db.query(models.User).filter(
+    user = await db.scalar(select(models.User).where(
         models.User.email == form_data.username
-    ).first()
+    ))
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    verified, new_hash = (
+        await verify_and_update_password(form_data.password, user.hashed_password) if user else (False, None)
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -190,6 +211,11 @@ async def login(
             detail="User account is inactive"
         )
     
+    if new_hash:
+        # Hashed with an older cost factor; upgrade it while the password is at hand
+        user.hashed_password = new_hash
+        await db.commit()
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
@@ -198,11 +224,11 @@ async def login(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/api/auth/register", response_model=UserResponse)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register new user"""
-    existing_user = db.query(models.User).filter(
+    existing_user = await db.scalar(select(models.User).where(
         models.User.email == user_data.email
-    ).first()
+    ))
     
     if existing_user:
         raise HTTPException(
@@ -213,77 +239,79 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     new_user = models.User(
         email=user_data.email,
         full_name=user_data.full_name,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash(user_data.password),
         role=user_data.role,
         department=user_data.department,
         is_active=True
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
 @app.get("/api/auth/me", response_model=UserResponse)
-async def get_me(current_user: models.User = Depends(get_current_user)):
+@query_budget(1)
+async def get_me(current_user: Principal = Depends(get_current_user)):
     """Get current user info"""
     return current_user
 
 # ============================================
-# JOBS ENDPOINTS
+# USER ADMINISTRATION
 # ============================================
 
-@app.get("/api/jobs")
-async def get_jobs(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get all jobs"""
-    jobs = db.query(models.JobPosting).all()
-    
-    result = []
-    for job in jobs:
-        job_dict = {
-            "id": job.id,
-            "title": job.job_title,
-            "description": job.job_description_text or "",
-            "department": job.department,
-            "location": "",
-            "experience_required": job.experience_range or "",
-            "skills_required": job.required_skills or "",
-            "status": job.status,
-            "created_by": job.created_by,
-            "created_at": job.created_at,
-            "updated_at": job.updated_at,
-            "referral_count": db.query(models.Referral).filter(
-                models.Referral.job_id == job.id
-            ).count()
-        }
-        result.append(job_dict)
-    
-    return result
-
-@app.get("/api/jobs/{job_id}")
-async def get_job(
-    job_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+@app.put("/api/users/{user_id}", response_model=UserResponse)
+async def update_user(
+    user_id: int,
+    user_data: UserUpdate,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get single job by ID"""
-    job = db.query(models.JobPosting).filter(models.JobPosting.id == job_id).first()
+    """Update a user's role, department or active flag (admin only)"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to update users")
     
-    if not job:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Job not found"
-        )
+    user = await db.get(models.User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    for field, value in user_data.model_dump(exclude_unset=True).items():
+        setattr(user, field, value)
     
-    referral_count = db.query(models.Referral).filter(
-        models.Referral.job_id == job.id
-    ).count()
+    # Cached principals for this user are dropped on commit
+    await db.commit()
+    await db.refresh(user)
     
-    job_dict = {
+    return user
+
+# ============================================
+# JOBS ENDPOINTS
+# ============================================
+
+JOB_SORT_COLUMNS = {
+    "id": models.JobPosting.id,
+    "title": models.JobPosting.job_title,
+    "department": models.JobPosting.department,
+    "status": models.JobPosting.status,
+    "created_at": models.JobPosting.created_at,
+    "updated_at": models.JobPosting.updated_at,
+}
+
+async def get_referral_counts(db: AsyncSession, job_ids: List[int]) -> dict:
+    """Count referrals for a set of jobs with a single grouped query"""
+    if not job_ids:
+        return {}
+    rows = await db.execute(select(
+        models.Referral.job_id, func.count(models.Referral.id)
+    ).where(
+        models.Referral.job_id.in_(job_ids)
+    ).group_by(models.Referral.job_id))
+    return {job_id: count for job_id, count in rows}
+
+def job_to_dict(job: models.JobPosting, referral_count: int) -> dict:
+    """Build the job payload returned by the jobs endpoints"""
+    return {
         "id": job.id,
         "title": job.job_title,
         "description": job.job_description_text or "",
@@ -297,108 +325,200 @@ async def get_job(
         "updated_at": job.updated_at,
         "referral_count": referral_count
     }
+
+@app.get("/api/jobs", response_model=List[schemas.JobResponse])
+@query_budget(5)
+async def get_jobs(
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    department: Optional[str] = None,
+    fte_flex: Optional[str] = None,
+    sort_by: str = Query("created_at", pattern="^(" + "|".join(JOB_SORT_COLUMNS) + ")$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get jobs with optional filters, sorting and pagination"""
+    not_modified = await conditional_list(db, request, response, JOB_LIST_TABLES, current_user)
+    if not_modified:
+        return not_modified
+    
+    query = select(models.JobPosting)
+    if status:
+        query = query.filter(models.JobPosting.status == status)
+    if department:
+        query = query.filter(models.JobPosting.department == department)
+    if fte_flex:
+        query = query.filter(models.JobPosting.fte_flex == fte_flex)
+    
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    response.headers["X-Total-Count"] = str(total)
+    
+    sort_column = JOB_SORT_COLUMNS[sort_by]
+    if order == "desc":
+        query = query.order_by(sort_column.desc(), models.JobPosting.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), models.JobPosting.id.asc())
+    jobs = (await db.scalars(query.offset(skip).limit(limit))).all()
+    
+    # One grouped query for the whole page instead of one count per job
+    counts = await get_referral_counts(db, [job.id for job in jobs])
     
-    return job_dict
+    return [job_to_dict(job, counts.get(job.id, 0)) for job in jobs]
+
+@app.get("/api/jobs/{job_id}", response_model=schemas.JobResponse)
+@query_budget(3)
+async def get_job(
+    job_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get single job by ID"""
+    job = await db.get(models.JobPosting, job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    counts = await get_referral_counts(db, [job.id])
+    
+    return job_to_dict(job, counts.get(job.id, 0))
 
 # ============================================
 # REFERRALS ENDPOINTS
 # ============================================
 
-@app.get("/api/referrals")
+def photo_thumbnail_url(ref: models.Referral) -> Optional[str]:
+    """List pages load this small variant instead of the original photo"""
+    if not ref.candidate_photo_url:
+        return None
+    return f"/api/referrals/{ref.id}/photo/variant?width={THUMBNAIL_SIZE}"
+
+def referral_to_dict(ref: models.Referral) -> dict:
+    """Build the referral payload returned by the referral list endpoints"""
+    return {
+        "id": ref.id,
+        "job_id": ref.job_id,
+        "job_title": ref.job.job_title if ref.job else "N/A",
+        "candidate_name": ref.candidate_name,
+        "candidate_email": ref.candidate_email,
+        "candidate_phone": ref.candidate_phone,
+        "candidate_linkedin": "",
+        "resume_path": ref.resume_url or "",
+        "photo_thumbnail_url": photo_thumbnail_url(ref),
+        "status": ref.status,
+        "referred_by": ref.referred_by,
+        "submitted_at": ref.created_at,
+        "updated_at": ref.updated_at,
+        "notes": ref.notes,
+        "department": ref.department,
+        "experience": ref.experience,
+        "skills": ref.skills,
+        "about_candidate": ref.about_candidate
+    }
+
+async def list_referrals(
+    db: AsyncSession,
+    response: Response,
+    referred_by: Optional[int],
+    status: Optional[str],
+    job_id: Optional[int],
+    department: Optional[str],
+    cursor: Optional[str],
+    limit: int
+) -> list:
+    """Fetch one keyset page of referrals with their job titles joined in"""
+    query = select(models.Referral).options(
+        joinedload(models.Referral.job).load_only(models.JobPosting.job_title)
+    )
+    if referred_by is not None:
+        query = query.filter(models.Referral.referred_by == referred_by)
+    if status:
+        query = query.filter(models.Referral.status == status)
+    if job_id:
+        query = query.filter(models.Referral.job_id == job_id)
+    if department:
+        query = query.filter(models.Referral.department == department)
+    
+    query = apply_keyset(query, models.Referral.created_at, models.Referral.id, cursor, limit)
+    referrals, next_cursor = split_page((await db.scalars(query)).all(), limit, "created_at")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return [referral_to_dict(ref) for ref in referrals]
+
+@app.get("/api/referrals", response_model=List[schemas.ReferralResponse])
+@query_budget(3)
 async def get_referrals(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    job_id: Optional[int] = None,
+    department: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all referrals (admin/hr/hiring_manager) or user's own referrals"""
     
-    if current_user.role in ["hr", "hiring_manager", "admin"]:
-        referrals = db.query(models.Referral).all()
-    else:
-        referrals = db.query(models.Referral).filter(
-            models.Referral.referred_by == current_user.id
-        ).all()
-    
-    result = []
-    for ref in referrals:
-        job = db.query(models.JobPosting).filter(models.JobPosting.id == ref.job_id).first()
-        ref_dict = {
-            "id": ref.id,
-            "job_id": ref.job_id,
-            "job_title": job.job_title if job else "N/A",
-            "candidate_name": ref.candidate_name,
-            "candidate_email": ref.candidate_email,
-            "candidate_phone": ref.candidate_phone,
-            "candidate_linkedin": "",
-            "resume_path": ref.resume_url or "",
-            "status": ref.status,
-            "referred_by": ref.referred_by,
-            "submitted_at": ref.created_at,
-            "updated_at": ref.updated_at,
-            "notes": ref.notes,
-            "department": ref.department,
-            "experience": ref.experience,
-            "skills": ref.skills,
-            "about_candidate": ref.about_candidate
-        }
-        result.append(ref_dict)
+    not_modified = await conditional_list(db, request, response, REFERRAL_LIST_TABLES, current_user)
+    if not_modified:
+        return not_modified
     
-    return result
+    referred_by = None
+    if current_user.role not in ["hr", "hiring_manager", "admin"]:
+        referred_by = current_user.id
+    
+    return await list_referrals(db, response, referred_by, status, job_id, department, cursor, limit)
 
-@app.get("/api/referrals/my-referrals")
+@app.get("/api/referrals/my-referrals", response_model=List[schemas.ReferralResponse])
+@query_budget(3)
 async def get_my_referrals(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    job_id: Optional[int] = None,
+    department: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's referrals"""
-    referrals = db.query(models.Referral).filter(
-        models.Referral.referred_by == current_user.id
-    ).all()
-    
-    result = []
-    for ref in referrals:
-        job = db.query(models.JobPosting).filter(models.JobPosting.id == ref.job_id).first()
-        ref_dict = {
-            "id": ref.id,
-            "job_id": ref.job_id,
-            "job_title": job.job_title if job else "N/A",
-            "candidate_name": ref.candidate_name,
-            "candidate_email": ref.candidate_email,
-            "candidate_phone": ref.candidate_phone,
-            "candidate_linkedin": "",
-            "resume_path": ref.resume_url or "",
-            "status": ref.status,
-            "referred_by": ref.referred_by,
-            "submitted_at": ref.created_at,
-            "updated_at": ref.updated_at,
-            "notes": ref.notes
-        }
-        result.append(ref_dict)
+    not_modified = await conditional_list(db, request, response, REFERRAL_LIST_TABLES, current_user)
+    if not_modified:
+        return not_modified
     
-    return result
+    return await list_referrals(db, response, current_user.id, status, job_id, department, cursor, limit)
+
+def ensure_can_view_referral(referral: Optional[models.Referral], current_user: Principal):
+    """404 for missing referrals, 403 unless HR roles or the referrer"""
+    if not referral:
+        raise HTTPException(status_code=404, detail="Referral not found")
+    
+    if current_user.role not in ["admin", "hr", "hiring_manager"] and referral.referred_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
 
 # ✅ GET REFERRAL BY ID - THIS WAS MISSING!
-@app.get("/api/referrals/{referral_id}")
+@app.get("/api/referrals/{referral_id}", response_model=schemas.ReferralDetailResponse)
+@query_budget(3)
 async def get_referral(
     referral_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get referral details by ID"""
     
-    referral = db.query(models.Referral).filter(
-        models.Referral.id == referral_id
-    ).first()
-    
-    if not referral:
-        raise HTTPException(status_code=404, detail="Referral not found")
-    
-    # Check authorization
-    if current_user.role not in ["admin", "hr", "hiring_manager"] and referral.referred_by != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized")
+    referral = await db.get(models.Referral, referral_id)
+    ensure_can_view_referral(referral, current_user)
     
-    job = db.query(models.JobPosting).filter(
-        models.JobPosting.id == referral.job_id
-    ).first()
+    job = await db.get(models.JobPosting, referral.job_id)
     
     return {
         "id": referral.id,
@@ -413,19 +533,106 @@ async def get_referral(
         "about_candidate": referral.about_candidate,
         "resume_url": referral.resume_url,
         "candidate_photo_url": referral.candidate_photo_url,
+        "photo_thumbnail_url": photo_thumbnail_url(referral),
         "status": referral.status,
         "referred_by": referral.referred_by,
-        "notes": referral.notes if hasattr(referral, 'notes') else None,
-        "created_at": referral.created_at.isoformat() if referral.created_at else None,
-        "updated_at": referral.updated_at.isoformat() if referral.updated_at else None
+        "notes": referral.notes,
+        "created_at": referral.created_at,
+        "updated_at": referral.updated_at
+    }
+
+# ================================
+# REFERRAL FILE DOWNLOADS
+# ================================
+
+@app.get("/api/referrals/{referral_id}/resume")
+async def download_resume(
+    referral_id: int,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Download a referral's resume"""
+    referral = await db.get(models.Referral, referral_id)
+    ensure_can_view_referral(referral, current_user)
+    
+    return file_download_response(request, referral.resume_url, f"resume-{referral_id}")
+
+@app.get("/api/referrals/{referral_id}/photo")
+async def download_photo(
+    referral_id: int,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Download a referral's candidate photo"""
+    referral = await db.get(models.Referral, referral_id)
+    ensure_can_view_referral(referral, current_user)
+    
+    return file_download_response(
+        request, referral.candidate_photo_url, f"photo-{referral_id}", disposition="inline"
+    )
+
+@app.get("/api/referrals/{referral_id}/photo/variant")
+async def download_photo_variant(
+    referral_id: int,
+    request: Request,
+    width: int = Query(THUMBNAIL_SIZE, ge=1, le=4096),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Smallest cached variant of the candidate photo at least width pixels wide,
+    as WebP when the client accepts it"""
+    referral = await db.get(models.Referral, referral_id)
+    ensure_can_view_referral(referral, current_user)
+    if not referral.candidate_photo_url:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    size = pick_size(width)
+    try:
+        variant = await variant_cache.get(
+            referral.candidate_photo_url, size, pick_format(request.headers.get("accept"))
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    return file_download_response(
+        request, str(variant), f"photo-{referral_id}-{size}", disposition="inline", headers={"Vary": "Accept"}
+    )
+
+async def document_text_response(db: AsyncSession, path: Optional[str]) -> dict:
+    """Extraction status and text for an uploaded file"""
+    if not path:
+        raise HTTPException(status_code=404, detail="File not found")
+    document = await db.scalar(select(models.DocumentText).where(models.DocumentText.file_path == path))
+    if not document:
+        return {"status": "not_queued", "text": None, "error": None, "extracted_at": None}
+    return {
+        "status": document.status,
+        "text": document.text,
+        "error": document.error,
+        "extracted_at": document.extracted_at
     }
 
+@app.get("/api/referrals/{referral_id}/resume/text")
+async def get_resume_text(
+    referral_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Text extracted from a referral's resume"""
+    referral = await db.get(models.Referral, referral_id)
+    ensure_can_view_referral(referral, current_user)
+    
+    return await document_text_response(db, referral.resume_url)
+
 # ================================
 # CREATE REFERRAL WITH FILE UPLOAD
 # ================================
 
 @app.post("/api/referrals")
 async def create_referral(
+    background_tasks: BackgroundTasks,
     candidate_name: str = Form(...),
     candidate_email: str = Form(...),
     candidate_phone: str = Form(None),
@@ -437,20 +644,20 @@ async def create_referral(
     referred_by: int = Form(...),
     resume: UploadFile = File(None),
     photo: UploadFile = File(None),
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new referral with file uploads"""
     
     # Save resume file
     resume_path = None
     if resume:
-        resume_path = save_upload_file(resume, RESUMES_DIR)
+        resume_path = (await save_upload_file(resume, RESUMES_DIR, MAX_RESUME_BYTES)).path
     
     # Save photo file
     photo_path = None
     if photo:
-        photo_path = save_upload_file(photo, PHOTOS_DIR)
+        photo_path = (await save_upload_file(photo, PHOTOS_DIR, MAX_PHOTO_BYTES)).path
     
     # Create referral
     new_referral = models.Referral(
@@ -469,8 +676,11 @@ async def create_referral(
     )
     
     db.add(new_referral)
-    db.commit()
-    db.refresh(new_referral)
+    await queue_extraction(db, resume_path, "resume")
+    await db.commit()
+    await db.refresh(new_referral)
+    extraction_worker.notify()
+    background_tasks.add_task(variant_cache.warm, photo_path)
     
     return {
         "id": new_referral.id,
@@ -484,6 +694,7 @@ async def create_referral(
 @app.put("/api/referrals/{referral_id}")
 async def update_referral(
     referral_id: int,
+    background_tasks: BackgroundTasks,
     candidate_name: str = Form(None),
     candidate_email: str = Form(None),
     candidate_phone: str = Form(None),
@@ -495,21 +706,13 @@ async def update_referral(
     status: str = Form(None),
     resume: UploadFile = File(None),
     photo: UploadFile = File(None),
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a referral with optional file uploads"""
     
-    referral = db.query(models.Referral).filter(
-        models.Referral.id == referral_id
-    ).first()
-    
-    if not referral:
-        raise HTTPException(status_code=404, detail="Referral not found")
-    
-    # Check authorization
-    if current_user.role not in ["admin", "hr", "hiring_manager"] and referral.referred_by != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized")
+    referral = await db.get(models.Referral, referral_id)
+    ensure_can_view_referral(referral, current_user)
     
     # Update fields
     if candidate_name: referral.candidate_name = candidate_name
@@ -522,18 +725,30 @@ async def update_referral(
     if about_candidate: referral.about_candidate = about_candidate
     if status: referral.status = status
     
+    replaced_files = []
+    
     # Update resume if provided
     if resume:
-        resume_path = save_upload_file(resume, RESUMES_DIR)
+        resume_path = (await save_upload_file(resume, RESUMES_DIR, MAX_RESUME_BYTES)).path
+        if referral.resume_url != resume_path:
+            replaced_files.append(referral.resume_url)
         referral.resume_url = resume_path
+        await queue_extraction(db, resume_path, "resume")
     
     # Update photo if provided
     if photo:
-        photo_path = save_upload_file(photo, PHOTOS_DIR)
+        photo_path = (await save_upload_file(photo, PHOTOS_DIR, MAX_PHOTO_BYTES)).path
+        if referral.candidate_photo_url != photo_path:
+            replaced_files.append(referral.candidate_photo_url)
         referral.candidate_photo_url = photo_path
+        background_tasks.add_task(variant_cache.warm, photo_path)
     
-    db.commit()
-    db.refresh(referral)
+    await db.commit()
+    await db.refresh(referral)
+    extraction_worker.notify()
+    
+    for path in replaced_files:
+        await release_upload(db, path)
     
     return {
         "id": referral.id,
@@ -544,14 +759,12 @@ async def update_referral(
 @app.delete("/api/referrals/{referral_id}")
 async def delete_referral(
     referral_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a referral"""
     
-    referral = db.query(models.Referral).filter(
-        models.Referral.id == referral_id
-    ).first()
+    referral = await db.get(models.Referral, referral_id)
     
     if not referral:
         raise HTTPException(status_code=404, detail="Referral not found")
@@ -560,11 +773,45 @@ async def delete_referral(
     if current_user.role not in ["admin", "hr"]:
         raise HTTPException(status_code=403, detail="Not authorized to delete referrals")
     
-    db.delete(referral)
-    db.commit()
+    await db.delete(referral)
+    await db.commit()
+    
+    await release_upload(db, referral.resume_url)
+    await release_upload(db, referral.candidate_photo_url)
     
     return {"message": "Referral deleted successfully"}
 
+# ================================
+# JOB DESCRIPTION DOWNLOAD
+# ================================
+
+@app.get("/api/jobs/{job_id}/job-description")
+async def download_job_description(
+    job_id: int,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Download a job's JD file"""
+    job = await db.get(models.JobPosting, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return file_download_response(request, job.job_description_url, f"job-description-{job_id}")
+
+@app.get("/api/jobs/{job_id}/job-description/text")
+async def get_job_description_text(
+    job_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Text extracted from a job's JD file"""
+    job = await db.get(models.JobPosting, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return await document_text_response(db, job.job_description_url)
+
 # ================================
 # CREATE JOB WITH FILE UPLOAD
 # ================================
@@ -581,8 +828,8 @@ async def create_job(
     status: str = Form("open"),
     created_by: int = Form(...),
     job_description_file: UploadFile = File(None),
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new job with optional JD file upload"""
     
@@ -593,7 +840,9 @@ async def create_job(
     # Save JD file if provided
     jd_file_path = None
     if job_description_file:
-        jd_file_path = save_upload_file(job_description_file, JOB_DESCRIPTIONS_DIR)
+        jd_file_path = (await save_upload_file(
+            job_description_file, JOB_DESCRIPTIONS_DIR, MAX_JOB_DESCRIPTION_BYTES
+        )).path
     
     # Create job
     new_job = models.JobPosting(
@@ -610,8 +859,10 @@ async def create_job(
     )
     
     db.add(new_job)
-    db.commit()
-    db.refresh(new_job)
+    await queue_extraction(db, jd_file_path, "job_description")
+    await db.commit()
+    await db.refresh(new_job)
+    extraction_worker.notify()
     
     return {
         "id": new_job.id,
@@ -634,14 +885,12 @@ async def update_job(
     required_skills: str = Form(None),
     status: str = Form(None),
     job_description_file: UploadFile = File(None),
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a job with optional JD file upload"""
     
-    job = db.query(models.JobPosting).filter(
-        models.JobPosting.id == job_id
-    ).first()
+    job = await db.get(models.JobPosting, job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -656,17 +905,28 @@ async def update_job(
     if experience_range: job.experience_range = experience_range
     if fte_flex: job.fte_flex = fte_flex
     if is_budgeted is not None: job.is_budgeted = is_budgeted
-    if job_description_text: job.job_description_text = job_description_text
+    if job_description_text:
+        job.job_description_text = job_description_text
+        job.job_description_extracted = False
     if required_skills: job.required_skills = required_skills
     if status: job.status = status
     
     # Update JD file if provided
+    replaced_file = None
     if job_description_file:
-        jd_file_path = save_upload_file(job_description_file, JOB_DESCRIPTIONS_DIR)
+        jd_file_path = (await save_upload_file(
+            job_description_file, JOB_DESCRIPTIONS_DIR, MAX_JOB_DESCRIPTION_BYTES
+        )).path
+        if job.job_description_url != jd_file_path:
+            replaced_file = job.job_description_url
         job.job_description_url = jd_file_path
+        await queue_extraction(db, jd_file_path, "job_description")
     
-    db.commit()
-    db.refresh(job)
+    await db.commit()
+    await db.refresh(job)
+    extraction_worker.notify()
+    
+    await release_upload(db, replaced_file)
     
     return {
         "id": job.id,
@@ -674,46 +934,116 @@ async def update_job(
     }
 
 # ============================================
-# ASSETS ENDPOINTS (INVENTORY)
+# SEARCH ENDPOINTS
 # ============================================
 
-@app.get("/api/assets")
-async def get_assets(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get all assets"""
-    assets = db.query(models.Asset).all()
-    
-    result = []
-    for asset in assets:
-        # Get current assignee user details if assigned
-        assigned_user = None
-        if asset.current_assignee_user_id:
-            assigned_user = db.query(models.User).filter(
-                models.User.id == int(asset.current_assignee_user_id)
-            ).first()
-        
-        asset_dict = {
-            "id": asset.id,
-            "serial_number": asset.laptop_serial_number or "",
-            "category": asset.category,
-            "model": asset.charger_number or "",
-            "manufacturer": "",
-            "purchase_date": asset.procurement_date,
-            "warranty_expiry": asset.warranty_expiry,
-            "status": asset.status,
-            "assigned_to": asset.current_assignee_user_id,
-            "assigned_to_name": asset.current_assignee_name or "",
-            "department": assigned_user.department if assigned_user else None,
-            "location": "",
-            "notes": asset.notes,
-            "created_at": asset.created_at,
-            "updated_at": asset.updated_at
+def search_page(response: Response, results: list, limit: int, offset: int) -> list:
+    """Trim the look-ahead row and expose the next offset when there is one"""
+    if len(results) > limit:
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return results[:limit]
+
+@app.get("/api/search/referrals")
+@query_budget(2)
+async def search_referrals_endpoint(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    offset: int = Query(0, ge=0, le=10000),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Ranked referral search; employees only see their own referrals"""
+    referred_by = None
+    if current_user.role not in ["hr", "hiring_manager", "admin"]:
+        referred_by = current_user.id
+
+    results = await search_referrals(db, q, limit + 1, offset, referred_by)
+    return search_page(response, results, limit, offset)
+
+@app.get("/api/search/jobs")
+@query_budget(2)
+async def search_jobs_endpoint(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    offset: int = Query(0, ge=0, le=10000),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Ranked job posting search"""
+    results = await search_jobs(db, q, limit + 1, offset)
+    return search_page(response, results, limit, offset)
+
+# ============================================
+# MATCHING ENDPOINTS
+# ============================================
+
+@app.get("/api/jobs/{job_id}/matches")
+@query_budget(5)
+async def get_job_matches(
+    job_id: int,
+    limit: int = Query(20, ge=1, le=200),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Best-matching referrals for a job by required skills (HR roles only)"""
+    if current_user.role not in ["admin", "hr", "hiring_manager"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    job = await db.get(models.JobPosting, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    index = await skill_index.get(db)
+    matches = index.candidates_for(parse_skills(job.required_skills), limit)
+    referrals = {
+        ref.id: ref for ref in await db.scalars(
+            select(models.Referral).where(models.Referral.id.in_([m["referral_id"] for m in matches]))
+        )
+    }
+    # Referrals deleted since the index was built are skipped
+    return [
+        {
+            **match,
+            "candidate_name": referrals[match["referral_id"]].candidate_name,
+            "job_id": referrals[match["referral_id"]].job_id,
+            "status": referrals[match["referral_id"]].status,
+            "department": referrals[match["referral_id"]].department,
         }
-        result.append(asset_dict)
-    
-    return result
+        for match in matches if match["referral_id"] in referrals
+    ]
+
+@app.get("/api/referrals/{referral_id}/matches")
+@query_budget(5)
+async def get_referral_matches(
+    referral_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Open jobs that best fit a referral's skills"""
+    referral = await db.get(models.Referral, referral_id)
+    ensure_can_view_referral(referral, current_user)
+
+    index = await skill_index.get(db)
+    matches = index.jobs_for(parse_skills(referral.skills), limit)
+    jobs = {
+        job.id: job for job in await db.scalars(
+            select(models.JobPosting).where(
+                models.JobPosting.id.in_([m["job_id"] for m in matches]),
+                models.JobPosting.status == "open"
+            )
+        )
+    }
+    return [
+        {
+            **match,
+            "job_title": jobs[match["job_id"]].job_title,
+            "department": jobs[match["job_id"]].department,
+        }
+        for match in matches if match["job_id"] in jobs
+    ]
 
 # ============================================
 # HEALTH CHECK
@@ -729,90 +1059,134 @@ async def root():
     }
 
 @app.get("/api/health")
-async def health_check():
-    """Detailed health check"""
+async def health_check(response: Response):
+    """Detailed health check; 503 when the database does not answer"""
+    database = await probe_database(async_engine)
+    if database["status"] != "connected":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
     return {
-        "status": "healthy",
+        "status": "healthy" if database["status"] == "connected" else "unhealthy",
         "timestamp": datetime.utcnow(),
-        "database": "connected"
+        "database": database,
+        "connection_pool": pool_stats(async_engine.sync_engine),
+        "password_hashing": hashing_pool.stats(),
+        "principal_cache": principal_cache.stats(),
+        "skill_index": skill_index.stats(),
+        "text_extraction": extraction_worker.stats(),
+        "photo_variants": variant_cache.stats(),
+        "conditional_get": conditional_get_stats.stats()
     }
-    
-    
-    # ========================================
-# ULTRA-SIMPLE FIX - COPY THIS ENTIRE FILE
-# Replace BOTH /api/assets endpoints in main.py
-# ========================================
 
-# GET all assets - WORKING VERSION
-@app.get("/api/assets")
-async def get_assets(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get all assets"""
-    assets = db.query(models.Asset).all()
-    
-    result = []
-    for asset in assets:
-        result.append({
-            "id": asset.id,
-            "serial_number": asset.laptop_serial_number or "",
-            "category": asset.category,
-            "model": asset.charger_number or "",
-            "manufacturer": "",
-            "purchase_date": asset.procurement_date.isoformat() if asset.procurement_date else None,
-            "warranty_expiry": asset.warranty_expiry.isoformat() if asset.warranty_expiry else None,
-            "status": asset.status,
-            "assigned_to": asset.current_assignee_user_id,
-            "assigned_to_name": asset.current_assignee_name or "",
-            "department": None,
-            "location": "",
-            "notes": asset.notes,
-            "created_at": asset.created_at.isoformat() if asset.created_at else None,
-            "updated_at": asset.updated_at.isoformat() if asset.updated_at else None
-        })
-    
-    return result
-
-
-# GET single asset - WORKING VERSION
-@app.get("/api/assets/{asset_id}")
-async def get_asset(
-    asset_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get a single asset by ID"""
-    asset = db.query(models.Asset).filter(models.Asset.id == asset_id).first()
-    
-    if not asset:
-        raise HTTPException(status_code=404, detail="Asset not found")
-    
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of request, SQL and pool metrics"""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ============================================
+# ASSETS ENDPOINTS (INVENTORY)
+# ============================================
+
+def select_assets_with_department():
+    """Assets joined to their assignee's department in the same query.
+
+    current_assignee_user_id is a string column, so the join compares it to the
+    user id rendered as text; ids that are not user ids (e.g. "EMP001") simply
+    find no department.
+    """
+    return select(models.Asset, models.User.department).outerjoin(
+        models.User,
+        cast(models.User.id, String) == models.Asset.current_assignee_user_id
+    )
+
+def asset_to_dict(asset: models.Asset, department: Optional[str]) -> dict:
+    """Build the asset payload returned by the asset endpoints"""
     return {
         "id": asset.id,
         "serial_number": asset.laptop_serial_number or "",
         "category": asset.category,
         "model": asset.charger_number or "",
         "manufacturer": "",
-        "purchase_date": asset.procurement_date.isoformat() if asset.procurement_date else None,
-        "warranty_expiry": asset.warranty_expiry.isoformat() if asset.warranty_expiry else None,
+        "purchase_date": asset.procurement_date,
+        "warranty_expiry": asset.warranty_expiry,
         "status": asset.status,
         "assigned_to": asset.current_assignee_user_id,
         "assigned_to_name": asset.current_assignee_name or "",
-        "department": None,
+        "department": department,
         "location": "",
         "notes": asset.notes,
-        "created_at": asset.created_at.isoformat() if asset.created_at else None,
-        "updated_at": asset.updated_at.isoformat() if asset.updated_at else None
+        "created_at": asset.created_at,
+        "updated_at": asset.updated_at
     }
 
+@app.get("/api/assets", response_model=List[schemas.AssetResponse])
+@query_budget(3)
+async def get_assets(
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    warranty_expires_after: Optional[datetime] = None,
+    warranty_expires_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get assets with optional filters, paged by (created_at, id) cursor"""
+    not_modified = await conditional_list(db, request, response, ASSET_LIST_TABLES, current_user)
+    if not_modified:
+        return not_modified
+    
+    query = select_assets_with_department()
+    # Equality filters on status / assignee are served by idx_assets_status
+    # and idx_assets_current_assignee, the unfiltered list by idx_assets_created_at_id
+    if status:
+        query = query.where(models.Asset.status == status)
+    if category:
+        query = query.where(models.Asset.category == category)
+    if assigned_to:
+        query = query.where(models.Asset.current_assignee_user_id == assigned_to)
+    if warranty_expires_after:
+        query = query.where(models.Asset.warranty_expiry >= warranty_expires_after)
+    if warranty_expires_before:
+        query = query.where(models.Asset.warranty_expiry < warranty_expires_before)
+    
+    query = apply_keyset(query, models.Asset.created_at, models.Asset.id, cursor, limit)
+    rows = (await db.execute(query)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1].Asset
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    
+    return [asset_to_dict(asset, department) for asset, department in rows]
+
+
+@app.get("/api/assets/{asset_id}", response_model=schemas.AssetResponse)
+@query_budget(2)
+async def get_asset(
+    asset_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a single asset by ID"""
+    row = (await db.execute(
+        select_assets_with_department().where(models.Asset.id == asset_id)
+    )).first()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    return asset_to_dict(row.Asset, row.department)
+
 
 # CREATE asset - NO CHANGES NEEDED
 @app.post("/api/assets")
 async def create_asset(
     asset_data: dict,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new asset"""
     if current_user.role not in ["admin", "hr"]:
@@ -831,22 +1205,44 @@ async def create_asset(
     )
     
     db.add(new_asset)
-    db.commit()
-    db.refresh(new_asset)
+    await db.commit()
+    await db.refresh(new_asset)
     
     return {"id": new_asset.id, "message": "Asset created successfully"}
 
 
+# BULK IMPORT assets from CSV / JSONL
+@app.post("/api/assets/import")
+async def import_assets(
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Upsert assets from a CSV or JSONL file and report per-row errors"""
+    if current_user.role not in ["admin", "hr"]:
+        raise HTTPException(status_code=403, detail="Not authorized to import assets")
+    
+    fmt = format or detect_format(file.filename)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Format must be csv or jsonl")
+    
+    try:
+        return await import_assets_async(db, iter_upload_lines(file), fmt)
+    finally:
+        await file.close()
+
+
 # UPDATE asset - NO CHANGES NEEDED
 @app.put("/api/assets/{asset_id}")
 async def update_asset(
     asset_id: int,
     asset_data: dict,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an asset"""
-    asset = db.query(models.Asset).filter(models.Asset.id == asset_id).first()
+    asset = await db.get(models.Asset, asset_id)
     
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
@@ -854,6 +1250,13 @@ async def update_asset(
     if current_user.role not in ["admin", "hr"]:
         raise HTTPException(status_code=403, detail="Not authorized to update assets")
     
+    # Custody changes must lock the row and write history, which only the assign/return endpoints do
+    if 'assigned_to' in asset_data or 'assigned_to_name' in asset_data:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Change the assignee with POST /api/assets/{asset_id}/assign or /api/assets/{asset_id}/return"
+        )
+    
     if 'serial_number' in asset_data:
         asset.laptop_serial_number = asset_data['serial_number']
     if 'category' in asset_data:
@@ -866,28 +1269,167 @@ async def update_asset(
         asset.warranty_expiry = asset_data['warranty_expiry']
     if 'status' in asset_data:
         asset.status = asset_data['status']
-    if 'assigned_to' in asset_data:
-        asset.current_assignee_user_id = asset_data['assigned_to']
-    if 'assigned_to_name' in asset_data:
-        asset.current_assignee_name = asset_data['assigned_to_name']
     if 'notes' in asset_data:
         asset.notes = asset_data['notes']
     
-    db.commit()
-    db.refresh(asset)
+    await db.commit()
+    await db.refresh(asset)
     
     return {"id": asset.id, "message": "Asset updated successfully"}
 
 
+# ============================================
+# ASSET ASSIGNMENT WORKFLOW
+# ============================================
+
+ASSET_CUSTODIAN_ROLES = ["admin", "hr", "inventory_manager"]
+
+@app.post("/api/assets/bulk-assign")
+async def bulk_assign_assets(
+    payload: schemas.BulkAssetAssign,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Assign many assets in one transaction"""
+    if current_user.role not in ASSET_CUSTODIAN_ROLES:
+        raise HTTPException(status_code=403, detail="Not authorized to assign assets")
+    
+    assets = await assign_assets(db, [(item.asset_id, item) for item in payload.assignments])
+    await db.commit()
+    
+    return {"updated": len(assets), "message": "Assets assigned successfully"}
+
+@app.post("/api/assets/bulk-return")
+async def bulk_return_assets(
+    payload: schemas.BulkAssetReturn,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Return many assets in one transaction"""
+    if current_user.role not in ASSET_CUSTODIAN_ROLES:
+        raise HTTPException(status_code=403, detail="Not authorized to return assets")
+    
+    assets = await return_assets(db, payload.asset_ids, payload.notes)
+    await db.commit()
+    
+    return {"updated": len(assets), "message": "Assets returned successfully"}
+
+@app.post("/api/assets/{asset_id}/assign")
+async def assign_asset(
+    asset_id: int,
+    assignment: schemas.AssetAssign,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Assign an asset, moving any current assignee to previous"""
+    if current_user.role not in ASSET_CUSTODIAN_ROLES:
+        raise HTTPException(status_code=403, detail="Not authorized to assign assets")
+    
+    await assign_assets(db, [(asset_id, assignment)])
+    await db.commit()
+    
+    return {"id": asset_id, "message": "Asset assigned successfully"}
+
+@app.post("/api/assets/{asset_id}/return")
+async def return_asset(
+    asset_id: int,
+    payload: Optional[schemas.AssetReturn] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Return an asset from its current assignee"""
+    if current_user.role not in ASSET_CUSTODIAN_ROLES:
+        raise HTTPException(status_code=403, detail="Not authorized to return assets")
+    
+    await return_assets(db, [asset_id], payload.notes if payload else None)
+    await db.commit()
+    
+    return {"id": asset_id, "message": "Asset returned successfully"}
+
+
+# ============================================
+# ASSET HISTORY
+# ============================================
+
+async def history_page(
+    db: AsyncSession,
+    response: Response,
+    owner_filter,
+    assigned_after: Optional[datetime],
+    assigned_before: Optional[datetime],
+    cursor: Optional[str],
+    limit: int
+) -> list:
+    """One keyset page of asset_history, newest assignment first.
+
+    owner_filter pins the leading column of idx_asset_history_asset_date or
+    idx_asset_history_assignee_date so the page is a single index range scan.
+    """
+    query = select(models.AssetHistory).where(owner_filter)
+    if assigned_after:
+        query = query.where(models.AssetHistory.assigned_date >= assigned_after)
+    if assigned_before:
+        query = query.where(models.AssetHistory.assigned_date < assigned_before)
+    
+    query = apply_keyset(query, models.AssetHistory.assigned_date, models.AssetHistory.id, cursor, limit)
+    entries, next_cursor = split_page((await db.scalars(query)).all(), limit, "assigned_date")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return entries
+
+@app.get("/api/assets/{asset_id}/history", response_model=List[schemas.AssetHistoryItem])
+@query_budget(2)
+async def get_asset_history(
+    asset_id: int,
+    response: Response,
+    assigned_after: Optional[datetime] = None,
+    assigned_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Chain of custody for one asset"""
+    if current_user.role not in ASSET_CUSTODIAN_ROLES:
+        raise HTTPException(status_code=403, detail="Not authorized to view asset history")
+    
+    return await history_page(
+        db, response, models.AssetHistory.asset_id == asset_id,
+        assigned_after, assigned_before, cursor, limit
+    )
+
+@app.get("/api/assets/assignees/{assignee_user_id}/history", response_model=List[schemas.AssetHistoryItem])
+@query_budget(2)
+async def get_assignee_asset_history(
+    assignee_user_id: str,
+    response: Response,
+    assigned_after: Optional[datetime] = None,
+    assigned_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Every asset an assignee has held (custodian roles, or the assignee themselves)"""
+    if current_user.role not in ASSET_CUSTODIAN_ROLES and assignee_user_id != str(current_user.id):
+        raise HTTPException(status_code=403, detail="Not authorized to view asset history")
+    
+    return await history_page(
+        db, response, models.AssetHistory.assignee_user_id == assignee_user_id,
+        assigned_after, assigned_before, cursor, limit
+    )
+
+
 # DELETE asset - NO CHANGES NEEDED
 @app.delete("/api/assets/{asset_id}")
 async def delete_asset(
     asset_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete an asset"""
-    asset = db.query(models.Asset).filter(models.Asset.id == asset_id).first()
+    asset = await db.get(models.Asset, asset_id)
     
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
@@ -895,11 +1437,32 @@ async def delete_asset(
     if current_user.role not in ["admin", "hr"]:
         raise HTTPException(status_code=403, detail="Not authorized to delete assets")
     
-    db.delete(asset)
-    db.commit()
+    await db.delete(asset)
+    await db.commit()
     
     return {"message": "Asset deleted successfully"}
 
+# ============================================
+# DASHBOARD STATS
+# ============================================
+
+@app.get("/api/stats")
+@query_budget(2)
+async def get_dashboard_stats(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Referral and asset counts by group, read from the maintained counters"""
+    tables = []
+    if current_user.role in ["admin", "hr", "hiring_manager"]:
+        tables.append("referrals")
+    if current_user.role in ASSET_CUSTODIAN_ROLES:
+        tables.append("assets")
+    if not tables:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    return await get_stats(db, tables)
+
 # ============================================
 # RUN SERVER
 # ============================================
@@ -0,0 +1,340 @@
+"""
+Skill matching between referrals and open job postings.
+
+Referral.skills and JobPosting.required_skills are free-form text (usually a
+JSON array). They are normalized into a shared vocabulary, and the index keeps
+CSR-style arrays of each row's skill ids plus inverted posting lists from
+skill id to referral rows and to open-job rows.
+
+Skills are weighted by inverse document frequency over referrals, so a rare
+skill counts for more than "communication". A match score is the share of a
+job's skill weight the referral covers (1.0 = every required skill). Scoring
+gathers the posting lists of the query's skills and sums them with
+np.bincount, so one query touches only rows sharing a skill and scoring
+every open job against every referral is a few hundred vector passes.
+
+The index is rebuilt lazily: ORM writes to skills, required_skills or job
+status mark it stale after commit, and a stale index is rebuilt at most once
+per MATCHING_REBUILD_INTERVAL seconds. Changes made by other workers or raw
+SQL are picked up after MATCHING_INDEX_TTL seconds.
+
+    python matching.py --top 5
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from starlette.concurrency import run_in_threadpool
+
+import models
+
+MATCHING_REBUILD_INTERVAL = float(os.getenv("MATCHING_REBUILD_INTERVAL", "30"))
+MATCHING_INDEX_TTL = float(os.getenv("MATCHING_INDEX_TTL", "300"))
+
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "react.js": "react",
+    "reactjs": "react",
+    "ml": "machine learning",
+    "c sharp": "c#",
+}
+
+# ============================================
+# NORMALIZATION
+# ============================================
+
+@lru_cache(maxsize=65536)
+def normalize_skill(skill: str) -> str:
+    skill = " ".join(skill.split()).lower()
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def parse_skills(raw: Optional[str]) -> List[str]:
+    """Distinct normalized skills from a JSON array or a comma separated string"""
+    if not raw:
+        return []
+    try:
+        values = json.loads(raw)
+    except ValueError:
+        values = re.split(r"[,;\n]", raw)
+    if isinstance(values, str):
+        values = re.split(r"[,;\n]", values)
+    elif not isinstance(values, list):
+        values = [values]
+    skills = (normalize_skill(str(value)) for value in values if isinstance(value, (str, int, float)))
+    return sorted({skill for skill in skills if skill})
+
+# ============================================
+# INDEX
+# ============================================
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest non-zero scores, best first"""
+    candidates = np.flatnonzero(scores)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class _SkillRows:
+    """Skill ids per row (CSR) and the inverted posting lists over them"""
+
+    def __init__(self, ids: List[int], skill_lists: List[List[int]], vocab_size: int):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        lengths = np.fromiter((len(skills) for skills in skill_lists), dtype=np.int64, count=len(skill_lists))
+        self.indptr = np.concatenate(([0], np.cumsum(lengths)))
+        self.skills = np.fromiter(
+            (skill for skills in skill_lists for skill in skills), dtype=np.int64, count=int(self.indptr[-1])
+        )
+        rows = np.repeat(np.arange(len(ids), dtype=np.int64), lengths)
+        self.df = np.bincount(self.skills, minlength=vocab_size)
+        self.postings_ptr = np.concatenate(([0], np.cumsum(self.df)))
+        self.postings = rows[np.argsort(self.skills, kind="stable")]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_skills(self, pos: int) -> np.ndarray:
+        return self.skills[self.indptr[pos]:self.indptr[pos + 1]]
+
+    def gather(self, skill_ids: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Summed weight of the given skills per row"""
+        starts, ends = self.postings_ptr[skill_ids], self.postings_ptr[skill_ids + 1]
+        if not len(skill_ids) or not (ends - starts).any():
+            return np.zeros(len(self), dtype=np.float64)
+        rows = np.concatenate([self.postings[start:end] for start, end in zip(starts, ends)])
+        return np.bincount(rows, weights=np.repeat(weights, ends - starts), minlength=len(self))
+
+
+class SkillIndex:
+    """Immutable snapshot of referral and open-job skills"""
+
+    def __init__(self, referral_rows: Iterable[Tuple[int, Optional[str]]], job_rows: Iterable[Tuple[int, Optional[str]]]):
+        self.vocabulary = {}
+        referral_ids, referral_skills = self._encode(referral_rows)
+        job_ids, job_skills = self._encode(job_rows)
+        self.skill_names = list(self.vocabulary)
+
+        vocab_size = len(self.vocabulary)
+        self.referrals = _SkillRows(referral_ids, referral_skills, vocab_size)
+        self.jobs = _SkillRows(job_ids, job_skills, vocab_size)
+        self.idf = self._idf(self.referrals.df)
+        self.job_weights = np.bincount(
+            np.repeat(np.arange(len(self.jobs)), np.diff(self.jobs.indptr)),
+            weights=self.idf[self.jobs.skills],
+            minlength=len(self.jobs),
+        )
+        self.built_at = time.monotonic()
+
+    def _encode(self, rows) -> Tuple[List[int], List[List[int]]]:
+        ids, skill_lists = [], []
+        # Identical skill strings are common (copied JDs, form presets); parse each once
+        encoded = {}
+        for row_id, raw in rows:
+            ids.append(row_id)
+            if raw not in encoded:
+                encoded[raw] = [self.vocabulary.setdefault(skill, len(self.vocabulary)) for skill in parse_skills(raw)]
+            skill_lists.append(encoded[raw])
+        return ids, skill_lists
+
+    def _idf(self, df: np.ndarray) -> np.ndarray:
+        return np.log((len(self.referrals) + 1) / (df + 1)) + 1.0
+
+    def _query(self, skills: List[str]) -> Tuple[np.ndarray, np.ndarray, float]:
+        """Known skill ids, their weights, and the total weight including unknown skills"""
+        known = np.asarray([self.vocabulary[s] for s in skills if s in self.vocabulary], dtype=np.int64)
+        weights = self.idf[known]
+        # A skill no referral has is as rare as it gets and still counts as required
+        unknown_weight = (len(skills) - len(known)) * float(self._idf(np.zeros(1))[0])
+        return known, weights, float(weights.sum()) + unknown_weight
+
+    def _matched(self, rows: _SkillRows, pos: int, query_ids: np.ndarray) -> List[str]:
+        return [self.skill_names[i] for i in np.intersect1d(rows.row_skills(pos), query_ids)]
+
+    def candidates_for(self, skills: List[str], k: int) -> List[dict]:
+        """Referrals covering the largest share of the given job skills"""
+        query_ids, weights, total = self._query(skills)
+        if total == 0:
+            return []
+        scores = self.referrals.gather(query_ids, weights) / total
+        return [
+            {
+                "referral_id": int(self.referrals.ids[pos]),
+                "score": round(float(scores[pos]), 4),
+                "matched_skills": self._matched(self.referrals, pos, query_ids),
+            }
+            for pos in _top_k(scores, k)
+        ]
+
+    def jobs_for(self, skills: List[str], k: int) -> List[dict]:
+        """Open jobs whose required skills the given skills cover best"""
+        query_ids, weights, _ = self._query(skills)
+        if not len(self.jobs):
+            return []
+        covered = self.jobs.gather(query_ids, weights)
+        scores = np.divide(covered, self.job_weights, out=np.zeros_like(covered), where=self.job_weights > 0)
+        return [
+            {
+                "job_id": int(self.jobs.ids[pos]),
+                "score": round(float(scores[pos]), 4),
+                "matched_skills": self._matched(self.jobs, pos, query_ids),
+                "missing_skills": [
+                    self.skill_names[i] for i in np.setdiff1d(self.jobs.row_skills(pos), query_ids)
+                ],
+            }
+            for pos in _top_k(scores, k)
+        ]
+
+    def match_all(self, k: int) -> dict:
+        """Top k referral positions and scores for every open job"""
+        results = {}
+        for pos in range(len(self.jobs)):
+            query_ids = self.jobs.row_skills(pos)
+            total = self.job_weights[pos]
+            if total == 0:
+                continue
+            scores = self.referrals.gather(query_ids, self.idf[query_ids]) / total
+            top = _top_k(scores, k)
+            results[int(self.jobs.ids[pos])] = list(zip(self.referrals.ids[top].tolist(), scores[top].tolist()))
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "skills": len(self.vocabulary),
+            "referrals": len(self.referrals),
+            "open_jobs": len(self.jobs),
+            "age_seconds": round(time.monotonic() - self.built_at, 1),
+        }
+
+
+def _referral_skills_query():
+    return select(models.Referral.id, models.Referral.skills)
+
+
+def _open_job_skills_query():
+    return select(models.JobPosting.id, models.JobPosting.required_skills).where(
+        models.JobPosting.status == "open"
+    )
+
+
+def build_skill_index(db: Session) -> SkillIndex:
+    return SkillIndex(db.execute(_referral_skills_query()).all(), db.execute(_open_job_skills_query()).all())
+
+
+class SkillIndexCache:
+    def __init__(self, rebuild_interval: float, ttl: float):
+        self.rebuild_interval = rebuild_interval
+        self.ttl = ttl
+        self.rebuilds = 0
+        self._index = None
+        self._stale = False
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._stale = True
+
+    def _fresh(self) -> bool:
+        if self._index is None:
+            return False
+        age = time.monotonic() - self._index.built_at
+        return age < self.ttl and not (self._stale and age >= self.rebuild_interval)
+
+    async def get(self, db: AsyncSession) -> SkillIndex:
+        if self._fresh():
+            return self._index
+        async with self._lock:
+            if not self._fresh():
+                self._stale = False
+                referral_rows = (await db.execute(_referral_skills_query())).all()
+                job_rows = (await db.execute(_open_job_skills_query())).all()
+                self._index = await run_in_threadpool(SkillIndex, referral_rows, job_rows)
+                self.rebuilds += 1
+            return self._index
+
+    def stats(self) -> dict:
+        stats = self._index.stats() if self._index else {}
+        return {**stats, "stale": self._stale, "rebuilds": self.rebuilds}
+
+
+skill_index = SkillIndexCache(MATCHING_REBUILD_INTERVAL, MATCHING_INDEX_TTL)
+
+# ============================================
+# INVALIDATION ON WRITES
+# ============================================
+
+_PENDING_KEY = "skill_index_stale"
+
+
+def _mark_pending(target):
+    session = object_session(target)
+    if session is not None:
+        session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(models.Referral, "after_insert")
+@event.listens_for(models.Referral, "after_delete")
+@event.listens_for(models.JobPosting, "after_insert")
+@event.listens_for(models.JobPosting, "after_delete")
+def _queue_rebuild(mapper, connection, target):
+    _mark_pending(target)
+
+
+@event.listens_for(models.Referral, "after_update")
+@event.listens_for(models.JobPosting, "after_update")
+def _queue_rebuild_on_change(mapper, connection, target):
+    state = inspect(target)
+    changed = ("skills",) if isinstance(target, models.Referral) else ("required_skills", "status")
+    if any(state.attrs[name].history.has_changes() for name in changed):
+        _mark_pending(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop(_PENDING_KEY, False):
+        skill_index.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Score every referral against every open job")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        index = build_skill_index(db)
+        built = time.perf_counter()
+        matches = index.match_all(args.top)
+        scored = time.perf_counter()
+    finally:
+        db.close()
+
+    for job_id, top in matches.items():
+        print(f"Job {job_id}: " + ", ".join(f"referral {ref_id} ({score:.2f})" for ref_id, score in top))
+    print("-" * 50)
+    print(f"✅ {index.stats()} built in {built - started:.2f}s, matched in {scored - built:.2f}s")
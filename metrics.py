@@ -0,0 +1,288 @@
+"""
+Prometheus metrics for the API, served as text from /metrics.
+
+MetricsMiddleware is a pure ASGI middleware, so it adds no extra task or
+response buffering per request. For each request it records:
+- latency, response size and status per route template
+- the number of requests in flight
+- the number of SQL statements and the time spent in them
+
+SQL statements are timed by cursor events on the sync engine and on the API's
+async engine. Each request gets a counter in a context variable, and
+SQLAlchemy's greenlets inherit it, so the events can attribute statements to
+the request that ran them. Statements outside a request (the extraction
+worker, CLIs) only feed the global statement histogram.
+
+Routes are labelled by their template (/api/referrals/{referral_id}) and
+unmatched paths share one label, so label cardinality stays bounded. Each
+worker process keeps its own registry; with several uvicorn workers, scrape
+each one or aggregate with the worker label your process manager adds.
+"""
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from pool_metrics import CHECKOUT_BUCKETS_MS, InstrumentedQueuePool
+
+# Seconds; chosen around the API's 10 ms - 1 s working range
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+STATEMENT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# ============================================
+# REGISTRY
+# ============================================
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(labels)
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._values.items()]
+        lines = []
+        names = self.label_names + ("le",)
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (_format_value(float(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """Register a function returning ready-made exposition lines, evaluated at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]))
+HTTP_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to the last response byte", LATENCY_BUCKETS, ["method", "route"]))
+HTTP_RESPONSE_SIZE = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size", SIZE_BUCKETS, ["method", "route"]))
+HTTP_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "Requests currently being handled"))
+REQUEST_QUERIES = registry.register(Histogram(
+    "db_statements_per_request", "SQL statements executed per request", QUERY_COUNT_BUCKETS, ["method", "route"]))
+REQUEST_QUERY_TIME = registry.register(Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per request", LATENCY_BUCKETS, ["method", "route"]))
+STATEMENT_DURATION = registry.register(Histogram(
+    "db_statement_duration_seconds", "Duration of individual SQL statements", STATEMENT_BUCKETS))
+
+# ============================================
+# SQL STATEMENT TIMING
+# ============================================
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar("request_queries", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Statement count and time of the request being handled, if any"""
+    return _request_queries.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    STATEMENT_DURATION.observe(elapsed)
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+
+def instrument_statements(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Record latency, size, status and SQL work for every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats = QueryStats()
+        token = _request_queries.set(stats)
+        status_code = 500
+        body_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, body_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            _request_queries.reset(token)
+            # The router stores the matched route in the shared scope
+            method, route = scope["method"], route_label(scope)
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, route)
+            HTTP_RESPONSE_SIZE.observe(body_bytes, method, route)
+            REQUEST_QUERIES.observe(stats.count, method, route)
+            REQUEST_QUERY_TIME.observe(stats.seconds, method, route)
+
+# ============================================
+# CONNECTION POOL
+# ============================================
+
+def pool_collector(engine, pool_name: str) -> Callable[[], List[str]]:
+    """Exposition lines for an InstrumentedQueuePool, read at scrape time"""
+    label = _format_labels(("pool",), (pool_name,))
+
+    def collect() -> List[str]:
+        pool = engine.pool
+        if not isinstance(pool, InstrumentedQueuePool):
+            return []
+        stats = pool.stats()
+        lines = []
+        for name, kind, key, documentation in (
+            ("db_pool_size", "gauge", "size", "Configured pool size"),
+            ("db_pool_checked_out", "gauge", "checked_out", "Connections currently checked out"),
+            ("db_pool_idle", "gauge", "idle", "Idle connections in the pool"),
+            ("db_pool_overflow", "gauge", "overflow", "Overflow connections currently open"),
+            ("db_pool_checkouts_total", "counter", "checkouts", "Connections handed out"),
+            ("db_pool_timeouts_total", "counter", "timeouts", "Checkouts that timed out waiting for a connection"),
+            ("db_pool_overflow_checkouts_total", "counter", "overflow_checkouts", "Checkouts that opened an overflow connection"),
+            ("db_pool_connects_total", "counter", "connects", "New DBAPI connections opened"),
+            ("db_pool_invalidations_total", "counter", "invalidations", "Connections invalidated"),
+            ("db_pool_soft_invalidations_total", "counter", "soft_invalidations", "Connections soft-invalidated"),
+        ):
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}", f"{name}{label} {stats[key]}"]
+
+        name = "db_pool_checkout_seconds"
+        lines += [f"# HELP {name} Time to obtain a connection from the pool", f"# TYPE {name} histogram"]
+        counts = pool.metrics.checkout_buckets
+        cumulative = 0
+        for bound, count in zip(CHECKOUT_BUCKETS_MS + (float("inf"),), counts):
+            cumulative += count
+            le = _format_value(bound / 1000) if bound != float("inf") else "+Inf"
+            lines.append(f'{name}_bucket{{pool="{pool_name}",le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum{label} {_format_value(pool.metrics.checkout_seconds)}")
+        lines.append(f"{name}_count{label} {stats['checkouts']}")
+        return lines
+
+    return collect
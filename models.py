@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -32,12 +32,17 @@ class JobPosting(Base):
     is_budgeted = Column(Boolean, default=True)
     job_description_url = Column(String)
     job_description_text = Column(Text)
+    job_description_extracted = Column(Boolean, default=False)  # text came from the JD file, see text_extraction.py
     required_skills = Column(Text)  # JSON string of skills array
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     referrals = relationship("Referral", back_populates="job")
+    
+    __table_args__ = (
+        Index("idx_jobs_job_description_url", "job_description_url"),
+    )
 
 class Referral(Base):
     __tablename__ = "referrals"
@@ -61,6 +66,16 @@ class Referral(Base):
     
     job = relationship("JobPosting", back_populates="referrals")
     referred_by_user = relationship("User", back_populates="referrals")
+    
+    # Upload blobs are shared, so GC looks rows up by file path; the list
+    # pages seek on (created_at, id), optionally after a status or referrer
+    __table_args__ = (
+        Index("idx_referrals_resume_url", "resume_url"),
+        Index("idx_referrals_candidate_photo_url", "candidate_photo_url"),
+        Index("idx_referrals_created_at_id", "created_at", "id"),
+        Index("idx_referrals_status_created_at", "status", "created_at", "id"),
+        Index("idx_referrals_referred_by_created_at", "referred_by", "created_at", "id"),
+    )
 
 class Asset(Base):
     __tablename__ = "assets"
@@ -94,6 +109,13 @@ class Asset(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     history = relationship("AssetHistory", back_populates="asset")
+    
+    # Mirrors SQL/sqlscript.sql; the asset list filters on these and seeks on (created_at, id)
+    __table_args__ = (
+        Index("idx_assets_status", "status"),
+        Index("idx_assets_current_assignee", "current_assignee_user_id"),
+        Index("idx_assets_created_at_id", "created_at", "id"),
+    )
 
 class AssetHistory(Base):
     __tablename__ = "asset_history"
@@ -109,4 +131,44 @@ class AssetHistory(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     asset = relationship("Asset", back_populates="history")
+    
+    # Timeline reads seek on (owner, assigned_date, id)
+    __table_args__ = (
+        Index("idx_asset_history_asset_date", "asset_id", "assigned_date", "id"),
+        Index("idx_asset_history_assignee_date", "assignee_user_id", "assigned_date", "id"),
+    )
 
+class DocumentText(Base):
+    __tablename__ = "document_texts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    file_path = Column(String, unique=True, nullable=False)  # Upload blob the text came from
+    kind = Column(String, nullable=False)  # 'resume' or 'job_description'
+    status = Column(String, default='pending')  # pending, processing, done, failed, unsupported
+    text = Column(Text)
+    error = Column(Text)
+    attempts = Column(Integer, default=0)
+    claimed_at = Column(DateTime)
+    extracted_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # The extraction worker polls for pending rows in id order
+    __table_args__ = (
+        Index("idx_document_texts_status", "status", "id"),
+    )
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+    
+    # Bumped by triggers on every write to the table, see table_versions.py
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+    
+    # Row counts per group, maintained by triggers, see stats.py
+    metric = Column(String, primary_key=True)  # e.g. 'referrals.status'
+    group_key = Column(String, primary_key=True)  # '' for NULL
+    count = Column(BigInteger, nullable=False, default=0)
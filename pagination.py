@@ -0,0 +1,46 @@
+"""
+Keyset (cursor) pagination helpers shared by the list endpoints
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+def encode_cursor(sort_value: Optional[datetime], row_id: int) -> str:
+    """Encode the (sort value, id) of the last row on a page as an opaque cursor"""
+    payload = [sort_value.isoformat() if sort_value else None, row_id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (datetime.fromisoformat(sort_value) if sort_value else None), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_keyset(query, sort_column, id_column, cursor: Optional[str], limit: int):
+    """Order newest first on (sort_column, id_column) and seek past the cursor.
+
+    Fetches limit + 1 rows so the caller can tell whether another page exists.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+    return query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def split_page(rows: list, limit: int, sort_attr: str):
+    """Trim the look-ahead row and return (page, next_cursor)"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(getattr(last, sort_attr), last.id)
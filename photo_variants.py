@@ -0,0 +1,215 @@
+"""
+Resized candidate photo variants cached on disk.
+
+Photos are served to list pages as fixed-size variants instead of the
+original upload. A variant is generated lazily on first request (and
+for the list thumbnail right after upload). It is stored under
+uploads/photos/variants as ``<source sha256>-<size>.<webp|jpg>``, so
+identical photos share their variants and a replaced photo never serves a
+stale one.
+
+The cache is bounded by total bytes: each worker tracks variant files in LRU
+order (seeded from mtimes at startup) and deletes the least recently used ones
+once PHOTO_VARIANT_CACHE_BYTES is exceeded. A variant removed by another
+worker is simply generated again. Sources that are not named by their hash
+are hashed once per (path, mtime, size) and the key is remembered.
+"""
+
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+from starlette.concurrency import run_in_threadpool
+
+from uploads import CONTENT_HASH_NAME, PHOTOS_DIR, TEMP_SUFFIX
+
+VARIANTS_DIR = PHOTOS_DIR / "variants"
+VARIANTS_DIR.mkdir(exist_ok=True)
+
+# Bounding-box edge lengths in pixels, smallest first
+VARIANT_SIZES = (64, 128, 256, 512, 1024)
+THUMBNAIL_SIZE = 128
+PHOTO_VARIANT_CACHE_BYTES = int(os.getenv("PHOTO_VARIANT_CACHE_BYTES", str(256 * 1024 * 1024)))
+SOURCE_KEY_CACHE_SIZE = 4096
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpg": ("JPEG", "image/jpeg"),
+}
+
+
+def pick_size(width: int) -> int:
+    """Smallest fixed size that covers the requested width"""
+    for size in VARIANT_SIZES:
+        if size >= width:
+            return size
+    return VARIANT_SIZES[-1]
+
+
+def pick_format(accept: Optional[str]) -> str:
+    return "webp" if accept and "image/webp" in accept else "jpg"
+
+
+def _hash_file(source: Path) -> str:
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _render(source: Path, target: Path, size: int, fmt: str):
+    pil_format, _ = FORMATS[fmt]
+    try:
+        with Image.open(source) as image:
+            # Decode at reduced scale where the codec supports it (JPEG)
+            image.draft("RGB", (size, size))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            if pil_format == "JPEG" and image.mode != "RGB":
+                image = image.convert("RGB")
+            elif image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            temp_path = target.with_name(f".{uuid.uuid4().hex}{TEMP_SUFFIX}")
+            try:
+                image.save(temp_path, pil_format, quality=WEBP_QUALITY if fmt == "webp" else JPEG_QUALITY)
+                os.replace(temp_path, target)
+            finally:
+                temp_path.unlink(missing_ok=True)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as exc:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Photo cannot be resized") from exc
+
+
+class VariantCache:
+    """Byte-bounded LRU over the files in VARIANTS_DIR"""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        # path -> ((st_mtime_ns, st_size), sha256) for sources not named by their hash
+        self._source_keys = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.endswith(TEMP_SUFFIX):
+                    stat_result = entry.stat()
+                    files.append((stat_result.st_mtime, entry.name, stat_result.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.total_bytes += size
+
+    def _touch(self, name: str) -> bool:
+        with self._lock:
+            if name not in self._entries:
+                return False
+            self._entries.move_to_end(name)
+            return True
+
+    def _add(self, name: str, size: int):
+        evicted = []
+        with self._lock:
+            self.total_bytes += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_name, old_size = self._entries.popitem(last=False)
+                self.total_bytes -= old_size
+                self.evictions += 1
+                evicted.append(old_name)
+        for old_name in evicted:
+            (self.directory / old_name).unlink(missing_ok=True)
+
+    def _forget(self, name: str):
+        with self._lock:
+            size = self._entries.pop(name, None)
+            if size is not None:
+                self.total_bytes -= size
+
+    def _source_key(self, source: Path) -> str:
+        """Content hash of the source, taken from the name for content-addressed uploads"""
+        if CONTENT_HASH_NAME.fullmatch(source.stem):
+            return source.stem
+        stat_result = source.stat()
+        signature = (stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            cached = self._source_keys.get(source)
+            if cached and cached[0] == signature:
+                self._source_keys.move_to_end(source)
+                return cached[1]
+        key = _hash_file(source)
+        with self._lock:
+            self._source_keys[source] = (signature, key)
+            self._source_keys.move_to_end(source)
+            while len(self._source_keys) > SOURCE_KEY_CACHE_SIZE:
+                self._source_keys.popitem(last=False)
+        return key
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _get_or_create(self, source: Path, size: int, fmt: str) -> Path:
+        name = f"{self._source_key(source)}-{size}.{fmt}"
+        target = self.directory / name
+        if self._touch(name):
+            if target.exists():
+                self._count(hit=True)
+                return target
+            self._forget(name)
+        elif target.exists():
+            # Written by another worker
+            self._count(hit=True)
+            self._add(name, target.stat().st_size)
+            return target
+        self._count(hit=False)
+        _render(source, target, size, fmt)
+        self._add(name, target.stat().st_size)
+        return target
+
+    async def get(self, source_path: str, size: int, fmt: str) -> Path:
+        """Path of the size/format variant of a stored photo, rendering it if needed"""
+        return await run_in_threadpool(self._get_or_create, Path(source_path), size, fmt)
+
+    def warm(self, source_path: Optional[str]):
+        """Render the list thumbnails for a new upload (run as a background task)"""
+        if not source_path:
+            return
+        for fmt in FORMATS:
+            try:
+                self._get_or_create(Path(source_path), THUMBNAIL_SIZE, fmt)
+            except (HTTPException, FileNotFoundError):
+                return
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+variant_cache = VariantCache(VARIANTS_DIR, PHOTO_VARIANT_CACHE_BYTES)
@@ -0,0 +1,171 @@
+"""
+Connection pool instrumentation.
+
+Both engines in database.py use InstrumentedQueuePool (or its asyncio
+variant). The pool records how long each checkout took, which checkouts ran
+into the overflow, and which ones timed out. Pool events record opened
+connections and invalidations (connections discarded after a disconnect
+error or a failed pre-ping, and soft ones marked to be replaced on their
+next checkout). stats() combines these counters with the pool's live
+occupancy for /api/health, which also times a SELECT 1 through the API pool
+with probe_database().
+
+Checkout time is measured around Pool.connect(). It covers queueing for a
+free connection, plus opening a new one or pre-pinging an idle one when that
+is needed.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DB_HEALTH_TIMEOUT = float(os.getenv("DB_HEALTH_TIMEOUT", "2"))
+
+# Upper bounds (ms) of the checkout time histogram; the last bucket is open
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_seconds = 0.0
+        self.max_checkout_seconds = 0.0
+        self.checkout_buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+        self.timeouts = 0
+        self.overflow_checkouts = 0
+        self.peak_overflow = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self._lock = threading.Lock()
+
+    def record_checkout(self, seconds: float):
+        elapsed_ms = seconds * 1000
+        bucket = next((i for i, bound in enumerate(CHECKOUT_BUCKETS_MS) if elapsed_ms <= bound), len(CHECKOUT_BUCKETS_MS))
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_seconds += seconds
+            self.max_checkout_seconds = max(self.max_checkout_seconds, seconds)
+            self.checkout_buckets[bucket] += 1
+
+    def record_overflow(self, overflow: int):
+        with self._lock:
+            self.overflow_checkouts += 1
+            self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self, soft: bool):
+        with self._lock:
+            if soft:
+                self.soft_invalidations += 1
+            else:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "avg_checkout_ms": round(self.checkout_seconds / self.checkouts * 1000, 3) if self.checkouts else None,
+                "max_checkout_ms": round(self.max_checkout_seconds * 1000, 3),
+                "checkout_ms_buckets": {
+                    **{f"le_{bound}": count for bound, count in zip(CHECKOUT_BUCKETS_MS, self.checkout_buckets)},
+                    "inf": self.checkout_buckets[-1],
+                },
+                "timeouts": self.timeouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "peak_overflow": self.peak_overflow,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout time, overflow use and timeouts"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+    def _inc_overflow(self) -> bool:
+        # Called when the queue has no idle connection; overflow() counts up
+        # from -pool_size, so a positive value means this one is beyond pool_size
+        # (overflow connections are closed on checkin, so each is one checkout)
+        opened = super()._inc_overflow()
+        if opened and self.overflow() > 0:
+            self.metrics.record_overflow(self.overflow())
+        return opened
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            **self.metrics.stats(),
+        }
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine):
+    """Count connects and invalidations for an engine's pool; a no-op for other pool classes"""
+    metrics = getattr(engine.pool, "metrics", None)
+    if metrics is None:
+        return
+    event.listen(engine, "connect", lambda dbapi_connection, record: metrics.record_connect())
+    event.listen(engine, "invalidate", lambda dbapi_connection, record, error: metrics.record_invalidation(soft=False))
+    event.listen(engine, "soft_invalidate", lambda dbapi_connection, record, error: metrics.record_invalidation(soft=True))
+
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.stats()
+    return {"status": pool.status()}
+
+
+async def probe_database(async_engine) -> dict:
+    """Round trip of SELECT 1 through the API pool, bounded by DB_HEALTH_TIMEOUT"""
+    async def select_one():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(select_one(), DB_HEALTH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {"status": "timeout", "timeout_seconds": DB_HEALTH_TIMEOUT}
+    except Exception as error:
+        return {"status": "unavailable", "error": f"{type(error).__name__}: {error}"[:300]}
+    return {"status": "connected", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
@@ -0,0 +1,165 @@
+"""
+TTL-bounded LRU cache of authenticated principals keyed by token subject.
+
+get_current_user consults this before touching the users table. Entries are
+dropped explicitly whenever a User row is updated or deleted through the ORM
+(after the transaction commits), and expire after PRINCIPAL_CACHE_TTL seconds
+so changes made by other workers or raw SQL are picked up in bounded time.
+
+A cache miss reads the row and then puts it back. An invalidation that
+commits while that read is in flight would otherwise be overwritten by the
+row read before it, so every invalidation bumps the subject's generation,
+and put() drops a principal read under an older generation.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+import models
+
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of the user fields needed for authorization"""
+    id: int
+    email: str
+    full_name: str
+    role: str
+    department: Optional[str]
+    is_active: bool
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            department=user.department,
+            is_active=user.is_active,
+            created_at=user.created_at,
+        )
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        # Per-subject invalidation counters; clear() bumps the epoch for all subjects
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, subject: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[subject]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, subject: str) -> tuple:
+        """Token to read before loading a principal and pass to put()"""
+        with self._lock:
+            return self._epoch, self._generations.get(subject, 0)
+
+    def put(self, subject: str, principal: Principal, generation: tuple):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation != (self._epoch, self._generations.get(subject, 0)):
+                # Invalidated while the row was being read; it may be stale
+                return
+            self._entries[subject] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._generations[subject] = self._generations.get(subject, 0) + 1
+            if self._entries.pop(subject, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_TTL, PRINCIPAL_CACHE_SIZE)
+
+# ============================================
+# INVALIDATION ON USER CHANGES
+# ============================================
+
+_PENDING_KEY = "principal_cache_invalidate"
+
+
+def _user_subjects(user: models.User) -> set:
+    """Current and pre-change email of a user, either may be cached"""
+    subjects = {user.email}
+    history = inspect(user).attrs.email.history
+    subjects.update(email for email in history.deleted or () if email)
+    return subjects
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _queue_invalidation(mapper, connection, user):
+    subjects = _user_subjects(user)
+    # Drop now so this worker stops trusting the old row, and again after
+    # commit in case a concurrent request re-cached it in between
+    for subject in subjects:
+        principal_cache.invalidate(subject)
+    session = object_session(user)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).update(subjects)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for subject in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate(subject)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,193 @@
+"""
+Per-request SQL query budgets and N+1 detection for development and tests.
+
+Enable with QUERY_BUDGET_MODE:
+- off (default): no statement tracing; @query_budget only tags the endpoint
+- log: trace every request, log budget overruns and repeated statement
+  shapes with a stack sample, and add an X-Query-Count response header
+- strict: like log, but the statement that exceeds the route's budget
+  raises QueryBudgetExceeded, so the request fails with a 500. tests/
+  runs in this mode (python -m pytest tests), against a seeded SQLite DB.
+
+A route declares its budget by putting @query_budget(n) under its @app
+decorator. The budget counts every statement the request runs, including the
+principal lookup in get_current_user on a cache miss. Routes without one use
+QUERY_BUDGET_DEFAULT, if set.
+
+Statements are grouped by shape: whitespace collapsed, literals and
+parameter lists replaced by placeholders. A shape that runs
+N_PLUS_ONE_THRESHOLD or more times in one request is reported as a likely
+N+1 loop. The stack sample starts at the first call site of that shape and
+follows async sessions from SQLAlchemy's greenlet back into the awaiting
+handler.
+"""
+
+import logging
+import os
+import re
+import sys
+from collections import Counter as ShapeCounter
+from contextvars import ContextVar
+from typing import List, Optional
+
+import greenlet
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off")
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", "0")) or None
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "3"))
+STACK_SAMPLE_FRAMES = 6
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_statements: int):
+    """Declare the most SQL statements one request to this endpoint may run"""
+    def decorator(endpoint):
+        endpoint.__query_budget__ = max_statements
+        return endpoint
+    return decorator
+
+# ============================================
+# STATEMENT SHAPES
+# ============================================
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%s|\$\d+|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|\$\d+|%\(\w+\)s|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """Statement text with literals and IN/VALUES lists collapsed, for grouping"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING_LITERAL.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    return _PLACEHOLDER_LIST.sub("(...)", shape)
+
+
+def _project_frames(frame) -> List[str]:
+    frames = []
+    while frame is not None and len(frames) < STACK_SAMPLE_FRAMES:
+        filename = frame.f_code.co_filename
+        # Skip library code and the ASGI middlewares (__call__) every request passes through
+        if (filename.startswith(PROJECT_ROOT) and filename != __file__ and "site-packages" not in filename
+                and frame.f_code.co_name != "__call__"):
+            frames.append(f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    return frames
+
+
+def stack_sample() -> List[str]:
+    """Innermost project frames of the code that issued the current statement"""
+    frames = _project_frames(sys._getframe(1))
+    # AsyncSession runs statements in a child greenlet; the handler is
+    # suspended in the parent greenlet that awaits it
+    parent = greenlet.getcurrent().parent
+    while parent is not None and len(frames) < STACK_SAMPLE_FRAMES:
+        frames += _project_frames(parent.gr_frame)
+        parent = parent.parent
+    return frames[:STACK_SAMPLE_FRAMES]
+
+# ============================================
+# REQUEST TRACE
+# ============================================
+
+class RequestTrace:
+    def __init__(self, scope):
+        self.scope = scope
+        self.count = 0
+        self.shapes = ShapeCounter()
+        self.first_seen = {}
+
+    @property
+    def budget(self) -> Optional[int]:
+        # The router stores the matched route in the shared scope before the endpoint runs
+        endpoint = getattr(self.scope.get("route"), "endpoint", None)
+        return getattr(endpoint, "__query_budget__", QUERY_BUDGET_DEFAULT)
+
+    @property
+    def route(self) -> str:
+        return getattr(self.scope.get("route"), "path", None) or self.scope["path"]
+
+    def record(self, statement: str):
+        self.count += 1
+        shape = normalize_statement(statement)
+        self.shapes[shape] += 1
+        if shape not in self.first_seen:
+            self.first_seen[shape] = stack_sample()
+        budget = self.budget
+        if QUERY_BUDGET_MODE == "strict" and budget is not None and self.count > budget:
+            raise QueryBudgetExceeded(
+                f"{self.scope['method']} {self.route} ran {self.count} SQL statements, budget is {budget}; "
+                f"statement: {shape[:200]} at {' <- '.join(stack_sample())}"
+            )
+
+    def repeated_shapes(self) -> list:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= N_PLUS_ONE_THRESHOLD]
+
+    def report(self):
+        """Log budget overruns and repeated statement shapes for the finished request"""
+        request = f"{self.scope['method']} {self.route}"
+        budget = self.budget
+        if budget is not None and self.count > budget:
+            logger.warning(
+                "Query budget exceeded: %s ran %d statements (budget %d)\n%s",
+                request, self.count, budget, self._describe(self.shapes.most_common()),
+            )
+        repeated = self.repeated_shapes()
+        if repeated:
+            logger.warning("Possible N+1 queries in %s:\n%s", request, self._describe(repeated))
+
+    def _describe(self, shapes: list) -> str:
+        return "\n".join(
+            f"  {count}x {shape[:300]}\n" + "\n".join(f"      at {frame}" for frame in self.first_seen[shape])
+            for shape, count in shapes
+        )
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("query_trace", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(statement)
+
+
+def trace_statements(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+class QueryBudgetMiddleware:
+    """Trace the SQL each request runs; add X-Query-Count and report violations"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope)
+        token = _current_trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-query-count", str(trace.count).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            trace.report()
@@ -66,6 +66,21 @@ class JobPosting(JobPostingBase):
     class Config:
         from_attributes = True
 
+# Payload of the jobs endpoints, built by main.job_to_dict
+class JobResponse(BaseModel):
+    id: int
+    title: str
+    description: str
+    department: str
+    location: str
+    experience_required: str
+    skills_required: str
+    status: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    referral_count: int
+
 # Referral Schemas
 class ReferralBase(BaseModel):
     job_id: int
@@ -97,6 +112,48 @@ class Referral(ReferralBase):
     class Config:
         from_attributes = True
 
+# Payloads of the referral endpoints; emails are plain str so legacy rows
+# are never rejected on the way out
+class ReferralResponse(BaseModel):
+    id: int
+    job_id: int
+    job_title: str
+    candidate_name: str
+    candidate_email: str
+    candidate_phone: Optional[str] = None
+    candidate_linkedin: str
+    resume_path: str
+    photo_thumbnail_url: Optional[str] = None
+    status: Optional[str] = None
+    referred_by: int
+    submitted_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    notes: Optional[str] = None
+    department: Optional[str] = None
+    experience: Optional[str] = None
+    skills: Optional[str] = None
+    about_candidate: Optional[str] = None
+
+class ReferralDetailResponse(BaseModel):
+    id: int
+    job_id: int
+    job_title: str
+    candidate_name: str
+    candidate_email: str
+    candidate_phone: Optional[str] = None
+    department: Optional[str] = None
+    experience: Optional[str] = None
+    skills: Optional[str] = None
+    about_candidate: Optional[str] = None
+    resume_url: Optional[str] = None
+    candidate_photo_url: Optional[str] = None
+    photo_thumbnail_url: Optional[str] = None
+    status: Optional[str] = None
+    referred_by: int
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 # Asset Schemas
 class AssetBase(BaseModel):
     laptop_serial_number: str
@@ -108,12 +165,29 @@ class AssetBase(BaseModel):
     mouse_pad: Optional[str] = None
 
 class AssetCreate(AssetBase):
-    pass
+    status: str = 'available'
+    notes: Optional[str] = None
+    procurement_date: Optional[datetime] = None
+    warranty_expiry: Optional[datetime] = None
 
 class AssetAssign(BaseModel):
     current_assignee_name: str
     current_assignee_user_id: str
     current_assignee_email: EmailStr
+    notes: Optional[str] = None
+
+class AssetReturn(BaseModel):
+    notes: Optional[str] = None
+
+class BulkAssetAssignItem(AssetAssign):
+    asset_id: int
+
+class BulkAssetAssign(BaseModel):
+    assignments: List[BulkAssetAssignItem]
+
+class BulkAssetReturn(BaseModel):
+    asset_ids: List[int]
+    notes: Optional[str] = None
 
 class AssetUpdate(BaseModel):
     charger_number: Optional[str] = None
@@ -142,8 +216,27 @@ class Asset(AssetBase):
     class Config:
         from_attributes = True
 
+# Payload of the asset endpoints, built by main.asset_to_dict
+class AssetResponse(BaseModel):
+    id: int
+    serial_number: str
+    category: Optional[str] = None
+    model: str
+    manufacturer: str
+    purchase_date: Optional[datetime] = None
+    warranty_expiry: Optional[datetime] = None
+    status: Optional[str] = None
+    assigned_to: Optional[str] = None
+    assigned_to_name: str
+    department: Optional[str] = None
+    location: str
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 class AssetHistoryItem(BaseModel):
     id: int
+    asset_id: int
     assignee_name: Optional[str]
     assignee_user_id: Optional[str]
     assignee_email: Optional[str]
@@ -0,0 +1,183 @@
+"""
+Full-text search over referrals and job postings.
+
+PostgreSQL keeps a weighted ``search_vector`` tsvector as a stored generated
+column on each table, indexed with GIN. SQLite (test and benchmark runs) uses
+external-content FTS5 tables kept in sync by triggers. Both are created from
+SQL/sqlscript.sql in production and by the DDL hooks below whenever
+Base.metadata.create_all builds the schema.
+
+Results are ranked, paged by offset and carry highlighted fragments with
+matches wrapped in <mark> tags. Highlights are escaped HTML: the database
+marks matches with private-use sentinel characters, the fragment is
+HTML-escaped, and only then are the sentinels turned into <mark> tags, so
+stored user text can never inject markup. Highlighting runs only on the
+returned page.
+"""
+
+import html
+import re
+from typing import List, Optional
+
+from sqlalchemy import DDL, event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+# Unicode private-use characters the database wraps matches in, before escaping
+_MATCH_START = "\ue000"
+_MATCH_STOP = "\ue001"
+
+# Fields in weight order (PostgreSQL A-D, bm25 weights on SQLite)
+REFERRAL_FIELDS = ["candidate_name", "skills", "about_candidate", "notes"]
+JOB_FIELDS = ["job_title", "required_skills", "job_description_text"]
+
+SQLITE_WEIGHTS = {
+    "referrals": "10.0, 5.0, 2.0, 1.0",
+    "job_postings": "10.0, 5.0, 1.0",
+}
+
+# ============================================
+# SCHEMA
+# ============================================
+
+def _pg_vector_expression(fields: List[str]) -> str:
+    return " || ".join(
+        f"setweight(to_tsvector('english', coalesce({field}, '')), '{weight}')"
+        for field, weight in zip(fields, "ABCD")
+    )
+
+
+def _pg_ddl(table: str, fields: List[str]) -> List[DDL]:
+    return [
+        DDL(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({_pg_vector_expression(fields)}) STORED"),
+        DDL(f"CREATE INDEX IF NOT EXISTS idx_{table}_search ON {table} USING GIN (search_vector)"),
+    ]
+
+
+def _sqlite_ddl(table: str, fields: List[str]) -> List[DDL]:
+    columns = ", ".join(fields)
+    new_values = ", ".join(f"new.{field}" for field in fields)
+    old_values = ", ".join(f"old.{field}" for field in fields)
+    insert_new = f"INSERT INTO {table}_fts(rowid, {columns}) VALUES (new.id, {new_values});"
+    delete_old = (f"INSERT INTO {table}_fts({table}_fts, rowid, {columns}) "
+                  f"VALUES ('delete', old.id, {old_values});")
+    return [
+        DDL(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5("
+            f"{columns}, content='{table}', content_rowid='id')"),
+        DDL(f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN {insert_new} END"),
+        DDL(f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN {delete_old} END"),
+        DDL(f"CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE ON {table} "
+            f"BEGIN {delete_old} {insert_new} END"),
+    ]
+
+
+for _model, _fields in ((models.Referral, REFERRAL_FIELDS), (models.JobPosting, JOB_FIELDS)):
+    _table = _model.__table__
+    for _ddl in _pg_ddl(_table.name, _fields):
+        event.listen(_table, "after_create", _ddl.execute_if(dialect="postgresql"))
+    for _ddl in _sqlite_ddl(_table.name, _fields):
+        event.listen(_table, "after_create", _ddl.execute_if(dialect="sqlite"))
+
+# ============================================
+# QUERIES
+# ============================================
+
+def _fts5_query(q: str) -> str:
+    """Quote each term so user input is never parsed as FTS5 syntax"""
+    terms = re.findall(r"\w+", q)
+    return " ".join('"' + term + '"' for term in terms)
+
+
+def _pg_search_sql(table: str, fields: List[str], select_columns: str, owner_clause: str) -> str:
+    headlines = ", ".join(
+        f"ts_headline('english', coalesce(t.{field}, ''), q.query, "
+        f"'StartSel={_MATCH_START}, StopSel={_MATCH_STOP}, MaxFragments=2, MinWords=5, MaxWords=20') "
+        f"AS {field}_highlight"
+        for field in fields
+    )
+    return f"""
+        WITH q AS (SELECT websearch_to_tsquery('english', :q) AS query),
+        page AS (
+            SELECT t.id, ts_rank_cd(t.search_vector, q.query) AS rank
+            FROM {table} t, q
+            WHERE t.search_vector @@ q.query {owner_clause}
+            ORDER BY rank DESC, t.id DESC
+            LIMIT :limit OFFSET :offset
+        )
+        SELECT {select_columns}, page.rank, {headlines}
+        FROM page JOIN {table} t ON t.id = page.id, q
+        ORDER BY page.rank DESC, t.id DESC
+    """
+
+
+def _sqlite_search_sql(table: str, fields: List[str], select_columns: str, owner_clause: str) -> str:
+    headlines = ", ".join(
+        f"snippet({table}_fts, {index}, '{_MATCH_START}', '{_MATCH_STOP}', '…', 20) AS {field}_highlight"
+        for index, field in enumerate(fields)
+    )
+    return f"""
+        SELECT {select_columns}, -bm25({table}_fts, {SQLITE_WEIGHTS[table]}) AS rank, {headlines}
+        FROM {table}_fts JOIN {table} t ON t.id = {table}_fts.rowid
+        WHERE {table}_fts MATCH :q {owner_clause}
+        ORDER BY bm25({table}_fts, {SQLITE_WEIGHTS[table]}), t.id DESC
+        LIMIT :limit OFFSET :offset
+    """
+
+
+def _highlight_html(fragment: str) -> str:
+    """Escape a highlighted fragment as HTML, then turn the match sentinels into <mark> tags"""
+    escaped = html.escape(fragment)
+    return escaped.replace(_MATCH_START, HIGHLIGHT_START).replace(_MATCH_STOP, HIGHLIGHT_STOP)
+
+
+async def _search(
+    db: AsyncSession,
+    table: str,
+    fields: List[str],
+    select_columns: str,
+    q: str,
+    limit: int,
+    offset: int,
+    referred_by: Optional[int] = None
+) -> List[dict]:
+    dialect = db.get_bind().dialect.name
+    owner_clause = "AND t.referred_by = :referred_by" if referred_by is not None else ""
+    if dialect == "postgresql":
+        sql = _pg_search_sql(table, fields, select_columns, owner_clause)
+        params = {"q": q}
+    else:
+        q = _fts5_query(q)
+        if not q:
+            return []
+        sql = _sqlite_search_sql(table, fields, select_columns, owner_clause)
+        params = {"q": q}
+    params.update(limit=limit, offset=offset, referred_by=referred_by)
+
+    results = []
+    for row in (await db.execute(text(sql), params)).mappings():
+        result = {key: value for key, value in row.items() if not key.endswith("_highlight")}
+        # Only fields that actually matched carry a highlight
+        result["highlights"] = {
+            field: _highlight_html(row[f"{field}_highlight"]) for field in fields
+            if row[f"{field}_highlight"] and _MATCH_START in row[f"{field}_highlight"]
+        }
+        results.append(result)
+    return results
+
+
+async def search_referrals(
+    db: AsyncSession, q: str, limit: int, offset: int, referred_by: Optional[int] = None
+) -> List[dict]:
+    """Ranked referrals matching q, optionally limited to one referrer"""
+    columns = "t.id, t.job_id, t.candidate_name, t.candidate_email, t.department, t.status, t.referred_by"
+    return await _search(db, "referrals", REFERRAL_FIELDS, columns, q, limit, offset, referred_by)
+
+
+async def search_jobs(db: AsyncSession, q: str, limit: int, offset: int) -> List[dict]:
+    """Ranked job postings matching q"""
+    columns = "t.id, t.job_title, t.department, t.status, t.experience_range"
+    return await _search(db, "job_postings", JOB_FIELDS, columns, q, limit, offset)
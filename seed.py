@@ -0,0 +1,501 @@
+"""
+Seed the database with demo accounts and synthetic data at production scale.
+
+Generates users, job postings, referrals, assets and asset history with
+consistent foreign keys and skewed distributions: a few jobs attract most
+referrals, a few employees make most of them (the demo employee refers the
+most), and departments, statuses and categories follow weighted mixes. Output
+is deterministic for a given --seed.
+
+Rows are generated in vectorized batches with numpy and written with COPY on
+PostgreSQL (psycopg2) or executemany on SQLite, inside one transaction. Row
+triggers (search index, stat counters, table versions) are suspended during
+the load; afterwards the SQLite FTS indexes and stat counters are rebuilt in
+bulk, the table versions are bumped and the id sequences are moved past the
+explicit ids. Bcrypt runs once for the shared password of generated users and
+once per demo account.
+
+The bulk tables must be empty, or pass --reset to drop and recreate every
+table. --accounts-only just adds any missing demo account to an existing
+database.
+
+    python seed.py                              # demo accounts and a small dataset
+    python seed.py --scale large --reset        # 1M referrals, 100k assets
+    python seed.py --referrals 5000000 --assets 200000 --reset
+    python seed.py --accounts-only
+
+Demo accounts:
+    admin@company.com / admin123
+    hr@company.com / hr123
+    employee@company.com / employee123
+    inventory@company.com / inventory123
+"""
+
+import csv
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+
+import database
+import models
+# Imported for their create_all hooks (FTS, version triggers, stat counters)
+import search  # noqa: F401
+import stats
+import table_versions
+from hashing import pwd_context
+
+SCALES = {
+    "demo": {"referrals": 200, "assets": 100},
+    "small": {"referrals": 1_000, "assets": 10_000},
+    "medium": {"referrals": 100_000, "assets": 50_000},
+    "large": {"referrals": 1_000_000, "assets": 100_000},
+}
+
+# (email, password, full name, role, department); ids 1-4 in this order
+DEMO_ACCOUNTS = [
+    ("admin@company.com", "admin123", "Admin User", "admin", "IT"),
+    ("hr@company.com", "hr123", "HR Manager", "hr", "Human Resources"),
+    ("employee@company.com", "employee123", "John Employee", "employee", "Engineering"),
+    ("inventory@company.com", "inventory123", "Inventory Manager", "inventory_manager", "IT"),
+]
+DEMO_EMPLOYEE_ID = 3
+# Shared password of every generated user
+GENERATED_PASSWORD = "password123"
+
+BATCH_ROWS = 50_000
+# Generated data spans the two years before this instant (epoch seconds)
+END_TIME = int(np.datetime64("2025-01-01T00:00:00", "s").astype(np.int64))
+SPAN_SECONDS = 2 * 365 * 86_400
+DAY = 86_400
+
+SEEDED_TABLES = ("users", "job_postings", "referrals", "assets", "asset_history")
+
+# ============================================
+# VOCABULARY
+# ============================================
+
+# Values and relative weights; statuses, roles and categories match the CHECK constraints in SQL/sqlscript.sql
+DEPARTMENTS = (["Engineering", "Sales", "Operations", "Product", "Marketing", "IT", "Finance", "Human Resources"],
+               [35, 15, 12, 10, 8, 7, 7, 6])
+ROLES = (["employee", "hiring_manager", "hr", "inventory_manager", "admin"], [90, 5, 3, 1, 1])
+JOB_STATUSES = (["open", "closed", "on_hold"], [70, 20, 10])
+REFERRAL_STATUSES = (["submitted", "under_review", "shortlisted", "interview_scheduled", "selected", "rejected"],
+                     [35, 20, 12, 10, 5, 18])
+ASSET_STATUSES = (["assigned", "available", "under_repair", "retired"], [65, 25, 6, 4])
+ASSET_CATEGORIES = (["laptop", "monitor", "desktop", "mouse", "keyboard", "headphones", "charger", "other"],
+                    [55, 15, 8, 7, 6, 5, 3, 1])
+
+SKILLS = ["python", "java", "javascript", "typescript", "react", "angular", "node.js", "sql", "postgresql",
+          "aws", "azure", "gcp", "docker", "kubernetes", "terraform", "go", "rust", "c++", "spark", "kafka",
+          "machine learning", "data analysis", "excel", "tableau", "salesforce", "figma", "product management",
+          "agile", "recruiting", "accounting", "negotiation", "seo", "linux", "networking", "security"]
+FIRST_NAMES = ["Aarav", "Aditi", "Alex", "Ananya", "Arjun", "Chen", "Daniel", "Divya", "Elena", "Fatima",
+               "Ishaan", "James", "Kavya", "Lakshmi", "Li", "Maria", "Meera", "Mohammed", "Nikhil", "Olivia",
+               "Priya", "Rahul", "Ravi", "Rohan", "Sara", "Sneha", "Sofia", "Tanvi", "Vikram", "Wei"]
+LAST_NAMES = ["Agarwal", "Bose", "Chen", "Das", "Fernandes", "Garcia", "Gupta", "Iyer", "Joshi", "Kapoor",
+              "Khan", "Kumar", "Li", "Mehta", "Menon", "Nair", "Patel", "Rao", "Reddy", "Shah", "Sharma",
+              "Singh", "Smith", "Srinivasan", "Verma", "Wang"]
+JOB_LEVELS = ["Junior", "", "Senior", "Staff", "Lead", "Principal"]
+JOB_ROLES = ["Software Engineer", "Data Engineer", "DevOps Engineer", "Data Analyst", "Product Manager",
+             "Product Designer", "Account Executive", "Recruiter", "Financial Analyst", "QA Engineer",
+             "Security Engineer", "Support Engineer", "Marketing Manager", "Operations Analyst"]
+EXPERIENCE_RANGES = ["0-2", "2-4", "3-5", "5-7", "7-10", "10+"]
+ABOUT_CANDIDATE = [
+    "Former colleague, strong ownership and communication.",
+    "Worked with them on a migration project; very reliable.",
+    "Met at a meetup, impressive open source contributions.",
+    "University friend with a solid track record in the field.",
+    "Led a team of five at their current company.",
+]
+
+# ============================================
+# GENERATION
+# ============================================
+
+def _pick(rng: np.random.Generator, values_weights: tuple, size: int) -> np.ndarray:
+    """Indexes into values_weights[0] drawn by weight"""
+    weights = np.asarray(values_weights[1], dtype=float)
+    return rng.choice(len(weights), size=size, p=weights / weights.sum())
+
+
+def _zipf_rank(rng: np.random.Generator, size: int, n: int, skew: float) -> np.ndarray:
+    """0-based ranks below n with a long tail toward rank 0"""
+    # Wrap the unbounded tail around instead of piling it onto the last rank
+    return (rng.zipf(skew, size) - 1) % n
+
+
+def _timestamps(seconds: np.ndarray) -> List[str]:
+    """Timestamp strings for epoch seconds, in the format SQLAlchemy stores on SQLite"""
+    values = np.datetime_as_string(seconds.astype("datetime64[s]").astype("datetime64[us]"), unit="us")
+    return [value.replace("T", " ") for value in values.tolist()]
+
+
+def _nullable(values: list, present: np.ndarray) -> list:
+    return [value if keep else None for value, keep in zip(values, present.tolist())]
+
+
+def _batches(total: int) -> Iterator[np.ndarray]:
+    """Consecutive id ranges of up to BATCH_ROWS, starting at 1"""
+    for start in range(1, total + 1, BATCH_ROWS):
+        yield np.arange(start, min(start + BATCH_ROWS, total + 1), dtype=np.int64)
+
+
+class Population:
+    """Generated users, kept in memory so other tables can reference their names and emails"""
+
+    def __init__(self, rng: np.random.Generator, count: int):
+        self.count = count
+        ids = np.arange(1, count + 1)
+        first = rng.integers(0, len(FIRST_NAMES), count)
+        last = rng.integers(0, len(LAST_NAMES), count)
+        self.names = [f"{FIRST_NAMES[f]} {LAST_NAMES[l]}" for f, l in zip(first.tolist(), last.tolist())]
+        self.emails = [f"{name.lower().replace(' ', '.')}.{i}@company.com" for name, i in zip(self.names, ids.tolist())]
+        roles = _pick(rng, ROLES, count)
+        departments = _pick(rng, DEPARTMENTS, count)
+        self.roles = [ROLES[0][r] for r in roles.tolist()]
+        self.departments = [DEPARTMENTS[0][d] for d in departments.tolist()]
+        for index, (email, _, name, role, department) in enumerate(DEMO_ACCOUNTS):
+            self.emails[index], self.names[index] = email, name
+            self.roles[index], self.departments[index] = role, department
+        self.created = _timestamps(END_TIME - SPAN_SECONDS - rng.integers(0, 3 * 365 * DAY, count))
+        roles_array = np.array(self.roles)
+        # Ids that can post jobs, and referrers ordered by activity (demo employee first)
+        self.job_owners = np.flatnonzero(np.isin(roles_array, ["admin", "hr", "hiring_manager"])) + 1
+        others = np.setdiff1d(np.arange(len(DEMO_ACCOUNTS) + 1, count + 1), [DEMO_EMPLOYEE_ID])
+        self.referrers = np.concatenate(([DEMO_EMPLOYEE_ID], rng.permutation(others)))
+
+    def rows(self, hashes: List[str]) -> Iterator[list]:
+        for ids in _batches(self.count):
+            yield [
+                (i, self.emails[i - 1], self.names[i - 1], hashes[i - 1] if i <= len(DEMO_ACCOUNTS) else hashes[-1],
+                 self.roles[i - 1], self.departments[i - 1], True, self.created[i - 1], self.created[i - 1])
+                for i in ids.tolist()
+            ]
+
+
+USER_COLUMNS = ("id", "email", "full_name", "hashed_password", "role", "department", "is_active",
+                "created_at", "updated_at")
+JOB_COLUMNS = ("id", "job_title", "department", "experience_range", "status", "fte_flex", "is_budgeted",
+               "job_description_text", "required_skills", "created_by", "created_at", "updated_at")
+REFERRAL_COLUMNS = ("id", "job_id", "candidate_name", "candidate_email", "candidate_phone", "department",
+                    "experience", "skills", "referred_by", "about_candidate", "status", "created_at", "updated_at")
+ASSET_COLUMNS = ("id", "laptop_serial_number", "charger_number", "mac_id", "category", "status",
+                 "current_assignee_name", "current_assignee_user_id", "current_assignee_email", "assigned_date",
+                 "procurement_date", "warranty_expiry", "created_at", "updated_at")
+HISTORY_COLUMNS = ("id", "asset_id", "assignee_name", "assignee_user_id", "assignee_email", "assigned_date",
+                   "returned_date", "notes", "created_at")
+
+
+def _skill_sets(rng: np.random.Generator, count: int, low: int, high: int) -> List[str]:
+    """A pool of comma separated skill lists; rows draw from it instead of sampling per row"""
+    return [", ".join(rng.choice(SKILLS, size=rng.integers(low, high + 1), replace=False)) for _ in range(count)]
+
+
+def job_rows(rng: np.random.Generator, count: int, people: Population) -> Iterator[list]:
+    skill_sets = _skill_sets(rng, 512, 3, 6)
+    titles = [f"{level} {role}".strip() for level in JOB_LEVELS for role in JOB_ROLES]
+    for ids in _batches(count):
+        n = len(ids)
+        created_seconds = END_TIME - rng.integers(0, SPAN_SECONDS, n)
+        created = _timestamps(created_seconds)
+        updated = _timestamps(created_seconds + rng.integers(0, 60 * DAY, n))
+        title = rng.integers(0, len(titles), n).tolist()
+        department = _pick(rng, DEPARTMENTS, n).tolist()
+        experience = rng.integers(0, len(EXPERIENCE_RANGES), n).tolist()
+        status = _pick(rng, JOB_STATUSES, n).tolist()
+        skills = rng.integers(0, len(skill_sets), n).tolist()
+        owner = people.job_owners[rng.integers(0, len(people.job_owners), n)].tolist()
+        yield [
+            (i, titles[title[k]], DEPARTMENTS[0][department[k]], EXPERIENCE_RANGES[experience[k]],
+             JOB_STATUSES[0][status[k]], "FTE" if i % 10 else "Flex", i % 17 != 0,
+             f"We are hiring a {titles[title[k]]} to build and run {skill_sets[skills[k]]} systems.",
+             skill_sets[skills[k]], owner[k], created[k], updated[k])
+            for k, i in enumerate(ids.tolist())
+        ]
+
+
+def referral_rows(rng: np.random.Generator, count: int, job_count: int, people: Population) -> Iterator[list]:
+    skill_sets = _skill_sets(rng, 4096, 2, 5)
+    experience_labels = [f"{years} years" for years in range(21)]
+    # Popularity order of jobs: rank 0 draws the most referrals
+    job_by_rank = rng.permutation(job_count) + 1
+    step = max(SPAN_SECONDS // count, 1)
+    for ids in _batches(count):
+        n = len(ids)
+        # created_at grows with id, like rows inserted over time
+        created_seconds = END_TIME - SPAN_SECONDS + (ids - 1) * SPAN_SECONDS // count + rng.integers(0, step, n)
+        status = _pick(rng, REFERRAL_STATUSES, n)
+        created = _timestamps(created_seconds)
+        updated = _timestamps(np.minimum(created_seconds + (status > 0) * rng.integers(DAY, 45 * DAY, n), END_TIME))
+        job = job_by_rank[_zipf_rank(rng, n, job_count, 1.3)].tolist()
+        referrer = people.referrers[_zipf_rank(rng, n, len(people.referrers), 1.2)].tolist()
+        first = rng.integers(0, len(FIRST_NAMES), n).tolist()
+        last = rng.integers(0, len(LAST_NAMES), n).tolist()
+        department = _pick(rng, DEPARTMENTS, n).tolist()
+        experience = np.minimum(rng.gamma(2.0, 3.0, n).astype(np.int64), 20).tolist()
+        skills = rng.integers(0, len(skill_sets), n).tolist()
+        about = rng.integers(0, len(ABOUT_CANDIDATE), n).tolist()
+        status = status.tolist()
+        rows = []
+        for k, i in enumerate(ids.tolist()):
+            first_name, last_name = FIRST_NAMES[first[k]], LAST_NAMES[last[k]]
+            rows.append((
+                i, job[k], f"{first_name} {last_name}", f"{first_name.lower()}.{last_name.lower()}{i}@example.com",
+                f"+91 9{i % 1_000_000_000:09d}", DEPARTMENTS[0][department[k]], experience_labels[experience[k]],
+                skill_sets[skills[k]], referrer[k], ABOUT_CANDIDATE[about[k]], REFERRAL_STATUSES[0][status[k]],
+                created[k], updated[k],
+            ))
+        yield rows
+
+
+def asset_rows(rng: np.random.Generator, count: int, people: Population) -> Iterator[tuple]:
+    """(asset rows, asset history rows) per batch; history covers past and current assignments"""
+    history_id = 0
+    for ids in _batches(count):
+        n = len(ids)
+        procured_seconds = END_TIME - rng.integers(30 * DAY, 4 * 365 * DAY, n)
+        age = END_TIME - procured_seconds
+        status = _pick(rng, ASSET_STATUSES, n)
+        category = _pick(rng, ASSET_CATEGORIES, n).tolist()
+        assigned = status == 0
+        assignee = rng.integers(1, people.count + 1, n)
+        assigned_seconds = procured_seconds + (age * rng.uniform(0.2, 1.0, n)).astype(np.int64)
+        assigned_dates = _nullable(_timestamps(assigned_seconds), assigned)
+        procured = _timestamps(procured_seconds)
+        warranty = _timestamps(procured_seconds + 3 * 365 * DAY)
+        updated = _timestamps(np.where(assigned, assigned_seconds, procured_seconds))
+        assets = []
+        for k, i in enumerate(ids.tolist()):
+            user = int(assignee[k]) if assigned[k] else None
+            assets.append((
+                i, f"SN{i:09d}", f"CH{i:09d}", "02:%02X:%02X:%02X:%02X:%02X" % tuple(i.to_bytes(5, "big")),
+                ASSET_CATEGORIES[0][category[k]], ASSET_STATUSES[0][status[k]],
+                people.names[user - 1] if user else None, str(user) if user else None,
+                people.emails[user - 1] if user else None, assigned_dates[k],
+                procured[k], warranty[k], procured[k], updated[k],
+            ))
+
+        # Earlier, returned assignments between procurement and the current one
+        past = rng.poisson(1.2, n)
+        owner = np.repeat(np.arange(n), past)
+        window = np.where(assigned, assigned_seconds, END_TIME)[owner] - procured_seconds[owner]
+        starts = procured_seconds[owner] + (window * rng.uniform(0, 0.9, len(owner))).astype(np.int64)
+        returns = np.minimum(starts + rng.integers(7 * DAY, 365 * DAY, len(owner)), END_TIME)
+        # Current assignments stay open
+        current = np.flatnonzero(assigned)
+        owner = np.concatenate((owner, current))
+        starts = np.concatenate((starts, assigned_seconds[current]))
+        users = np.concatenate((rng.integers(1, people.count + 1, len(owner) - len(current)), assignee[current]))
+        closed = np.arange(len(owner)) < len(returns)
+        returned = _nullable(_timestamps(np.concatenate((returns, np.zeros(len(current), dtype=np.int64)))), closed)
+        started = _timestamps(starts)
+        history = []
+        for k, (asset, user) in enumerate(zip(ids[owner].tolist(), users.tolist())):
+            history_id += 1
+            history.append((history_id, asset, people.names[user - 1], str(user), people.emails[user - 1],
+                            started[k], returned[k], None, started[k]))
+        yield assets, history
+
+# ============================================
+# LOADING
+# ============================================
+
+class BulkLoader:
+    """Batched COPY on PostgreSQL (psycopg2), executemany elsewhere, on one DBAPI connection"""
+
+    def __init__(self, dbapi_connection, dialect):
+        self.cursor = dbapi_connection.cursor()
+        self.copy = dialect.name == "postgresql" and hasattr(self.cursor, "copy_expert")
+        self.placeholder = "?" if dialect.paramstyle == "qmark" else "%s"
+
+    def load(self, table: str, columns: tuple, rows: list):
+        if not rows:
+            return
+        if self.copy:
+            buffer = io.StringIO()
+            # Unquoted empty fields are NULL in COPY's csv format
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            self.cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            placeholders = ", ".join([self.placeholder] * len(columns))
+            self.cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+
+@contextmanager
+def suspended_triggers(cursor, dialect: str):
+    """Drop (SQLite) or disable (PostgreSQL) row triggers on the seeded tables until the block exits"""
+    if dialect == "postgresql":
+        for table in SEEDED_TABLES:
+            cursor.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+        yield
+        for table in SEEDED_TABLES:
+            cursor.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+        return
+    tables = ", ".join(f"'{table}'" for table in SEEDED_TABLES)
+    cursor.execute(f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ({tables})")
+    triggers = cursor.fetchall()
+    for name, _ in triggers:
+        cursor.execute(f"DROP TRIGGER {name}")
+    yield
+    for _, sql in triggers:
+        cursor.execute(sql)
+
+
+def _rebuild_indexes(cursor, dialect: str):
+    """Refill what the suspended triggers would have maintained, and refresh planner statistics"""
+    if dialect == "sqlite":
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%\\_fts' ESCAPE '\\'")
+        for (name,) in cursor.fetchall():
+            cursor.execute(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+    if dialect == "postgresql":
+        # Explicit ids leave the sequences behind; sqlscript.sql uses <table>_seq, create_all serial columns
+        for table in SEEDED_TABLES:
+            cursor.execute(
+                f"SELECT setval(COALESCE(pg_get_serial_sequence('{table}', 'id'), '{table}_seq')::regclass, "
+                f"COALESCE(MAX(id), 1)) FROM {table}"
+            )
+    cursor.execute("ANALYZE")
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash in parallel threads; bcrypt releases the GIL"""
+    with ThreadPoolExecutor(max_workers=len(passwords)) as pool:
+        return list(pool.map(pwd_context.hash, passwords))
+
+
+def plan_counts(scale: str, users: Optional[int] = None, jobs: Optional[int] = None,
+                referrals: Optional[int] = None, assets: Optional[int] = None) -> dict:
+    """Row counts for a scale, with explicit overrides; users and jobs follow the referral volume"""
+    referrals = SCALES[scale]["referrals"] if referrals is None else referrals
+    return {
+        "users": max(users or max(100, referrals // 50), len(DEMO_ACCOUNTS) + 1),
+        "jobs": max(jobs or max(20, referrals // 500), 1),
+        "referrals": referrals,
+        "assets": SCALES[scale]["assets"] if assets is None else assets,
+    }
+
+
+def seed_database(counts: dict, random_seed: int = 42, reset: bool = False) -> dict:
+    """Create the schema, bulk-load generated rows and rebuild derived data; returns counts and timings"""
+    if reset:
+        database.Base.metadata.drop_all(database.engine)
+    database.Base.metadata.create_all(database.engine)
+    with database.SessionLocal() as db:
+        existing = [table for table in SEEDED_TABLES
+                    if db.scalar(select(func.count()).select_from(database.Base.metadata.tables[table]))]
+    if existing:
+        raise SystemExit(f"Tables already have rows ({', '.join(existing)}); pass --reset to drop and reseed them")
+
+    timings = {}
+    started = time.perf_counter()
+    rng = np.random.default_rng(random_seed)
+    hashes = hash_passwords([password for _, password, *_ in DEMO_ACCOUNTS] + [GENERATED_PASSWORD])
+    people = Population(rng, counts["users"])
+    timings["prepare"] = time.perf_counter() - started
+
+    dialect = database.engine.dialect.name
+    connection = database.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if dialect == "sqlite":
+            # Seeding is all-or-nothing, so skip per-write fsyncs
+            cursor.execute("PRAGMA synchronous = OFF")
+            cursor.execute("PRAGMA cache_size = -262144")
+            cursor.execute("BEGIN")
+        loader = BulkLoader(connection, database.engine.dialect)
+        history_count = 0
+        with suspended_triggers(cursor, dialect):
+            for table, columns, batches in (
+                ("users", USER_COLUMNS, people.rows(hashes)),
+                ("job_postings", JOB_COLUMNS, job_rows(rng, counts["jobs"], people)),
+                ("referrals", REFERRAL_COLUMNS, referral_rows(rng, counts["referrals"], counts["jobs"], people)),
+            ):
+                phase_started = time.perf_counter()
+                for rows in batches:
+                    loader.load(table, columns, rows)
+                timings[table] = time.perf_counter() - phase_started
+            phase_started = time.perf_counter()
+            for assets, history in asset_rows(rng, counts["assets"], people):
+                loader.load("assets", ASSET_COLUMNS, assets)
+                loader.load("asset_history", HISTORY_COLUMNS, history)
+                history_count += len(history)
+            timings["assets"] = time.perf_counter() - phase_started
+        phase_started = time.perf_counter()
+        _rebuild_indexes(cursor, dialect)
+        connection.commit()
+        timings["indexes"] = time.perf_counter() - phase_started
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        if dialect == "sqlite":
+            connection.cursor().execute("PRAGMA synchronous = FULL")
+        connection.close()
+
+    phase_started = time.perf_counter()
+    with database.SessionLocal() as db:
+        stats.rebuild_counters(db)
+        # Clients holding ETags from before the load must refetch
+        db.execute(
+            models.TableVersion.__table__.update()
+            .where(models.TableVersion.table_name.in_(table_versions.TRACKED_TABLES))
+            .values(version=models.TableVersion.version + 1)
+        )
+        db.commit()
+    timings["counters"] = time.perf_counter() - phase_started
+
+    return {
+        **counts,
+        "asset_history": history_count,
+        "seconds": round(time.perf_counter() - started, 1),
+        "phase_seconds": {phase: round(seconds, 2) for phase, seconds in timings.items()},
+    }
+
+
+def ensure_demo_accounts() -> List[str]:
+    """Add any missing demo account; returns the emails created"""
+    database.Base.metadata.create_all(database.engine)
+    with database.SessionLocal() as db:
+        existing = set(db.scalars(select(models.User.email).where(
+            models.User.email.in_([email for email, *_ in DEMO_ACCOUNTS])
+        )))
+        missing = [account for account in DEMO_ACCOUNTS if account[0] not in existing]
+        if missing:
+            hashes = hash_passwords([password for _, password, *_ in missing])
+            db.add_all(
+                models.User(email=email, full_name=name, hashed_password=hashed, role=role, department=department,
+                            is_active=True)
+                for (email, _, name, role, department), hashed in zip(missing, hashes)
+            )
+            db.commit()
+    return [email for email, *_ in missing]
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Seed demo accounts and synthetic data")
+    parser.add_argument("--scale", choices=SCALES, default="demo")
+    parser.add_argument("--users", type=int, help="default: referrals / 50")
+    parser.add_argument("--jobs", type=int, help="default: referrals / 500")
+    parser.add_argument("--referrals", type=int)
+    parser.add_argument("--assets", type=int)
+    parser.add_argument("--seed", type=int, default=42, help="random seed; the same seed gives the same data")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    parser.add_argument("--accounts-only", action="store_true", help="only add missing demo accounts")
+    args = parser.parse_args()
+
+    if args.accounts_only:
+        report = {"created": ensure_demo_accounts()}
+    else:
+        counts = plan_counts(args.scale, args.users, args.jobs, args.referrals, args.assets)
+        report = seed_database(counts, args.seed, args.reset)
+    print(json.dumps(report, indent=2))
+    print("Demo accounts: " + ", ".join(f"{email} / {password}" for email, password, *_ in DEMO_ACCOUNTS))
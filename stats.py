@@ -0,0 +1,208 @@
+"""
+Dashboard statistics from incrementally maintained group counters.
+
+stat_counters holds one row per (metric, group), e.g. ('referrals.status',
+'shortlisted'). Row-level triggers on referrals and assets adjust the
+affected groups on every insert, delete and grouping-column update, so
+/api/stats reads O(groups) rows instead of scanning the tables. Triggers live
+in SQL/sqlscript.sql (migration 006) on PostgreSQL and are created by the
+create_all hooks below on SQLite.
+
+Counters are exact as long as every write goes through the tables, including
+raw SQL and imports. TRUNCATE or disabling triggers makes them drift;
+`python stats.py --check` reports drift and `--rebuild` recomputes them.
+
+    python stats.py --check
+    python stats.py --rebuild
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import DDL, String, cast, column, event, func, literal, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import models
+from database import Base
+
+# Grouping columns per table; a metric is '<table>.<column>'
+STAT_GROUPS: Dict[str, List[str]] = {
+    "referrals": ["status", "department", "job_id"],
+    "assets": ["status", "category"],
+}
+
+# ============================================
+# SCHEMA
+# ============================================
+
+def _sqlite_upsert(metric: str, value: str, delta: int) -> str:
+    return (f"INSERT INTO stat_counters (metric, group_key, count) "
+            f"VALUES ('{metric}', COALESCE(CAST({value} AS TEXT), ''), {delta}) "
+            f"ON CONFLICT (metric, group_key) DO UPDATE SET count = count + ({delta});")
+
+
+def _sqlite_ddl(table_name: str, columns: List[str]) -> List[DDL]:
+    ddl = []
+    inserts = " ".join(_sqlite_upsert(f"{table_name}.{c}", f"new.{c}", 1) for c in columns)
+    deletes = " ".join(_sqlite_upsert(f"{table_name}.{c}", f"old.{c}", -1) for c in columns)
+    ddl.append(DDL(f"CREATE TRIGGER IF NOT EXISTS {table_name}_stats_insert AFTER INSERT ON {table_name} "
+                   f"BEGIN {inserts} END"))
+    ddl.append(DDL(f"CREATE TRIGGER IF NOT EXISTS {table_name}_stats_delete AFTER DELETE ON {table_name} "
+                   f"BEGIN {deletes} END"))
+    for c in columns:
+        metric = f"{table_name}.{c}"
+        ddl.append(DDL(
+            f"CREATE TRIGGER IF NOT EXISTS {table_name}_stats_update_{c} AFTER UPDATE OF {c} ON {table_name} "
+            f"WHEN old.{c} IS NOT new.{c} "
+            f"BEGIN {_sqlite_upsert(metric, f'old.{c}', -1)} {_sqlite_upsert(metric, f'new.{c}', 1)} END"
+        ))
+    return ddl
+
+
+def _pg_ddl(table_name: str, columns: List[str]) -> List[DDL]:
+    def bump(c, row, delta):
+        return f"PERFORM bump_stat_counter('{table_name}.{c}', {row}.{c}::text, {delta});"
+
+    inserts = "\n".join(bump(c, "NEW", 1) for c in columns)
+    deletes = "\n".join(bump(c, "OLD", -1) for c in columns)
+    updates = "\n".join(
+        f"IF OLD.{c} IS DISTINCT FROM NEW.{c} THEN {bump(c, 'OLD', -1)} {bump(c, 'NEW', 1)} END IF;"
+        for c in columns
+    )
+    return [
+        DDL(f"""
+            CREATE OR REPLACE FUNCTION maintain_{table_name}_stats()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    {inserts}
+                ELSIF TG_OP = 'DELETE' THEN
+                    {deletes}
+                ELSE
+                    {updates}
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """),
+        DDL(f"DROP TRIGGER IF EXISTS {table_name}_stats ON {table_name}"),
+        DDL(f"CREATE TRIGGER {table_name}_stats AFTER INSERT OR UPDATE OF {', '.join(columns)} OR DELETE "
+            f"ON {table_name} FOR EACH ROW EXECUTE FUNCTION maintain_{table_name}_stats()"),
+    ]
+
+
+_PG_BUMP_FUNCTION = DDL("""
+    CREATE OR REPLACE FUNCTION bump_stat_counter(p_metric TEXT, p_group TEXT, p_delta INTEGER)
+    RETURNS VOID AS $$
+    BEGIN
+        INSERT INTO stat_counters (metric, group_key, count)
+        VALUES (p_metric, COALESCE(p_group, ''), p_delta)
+        ON CONFLICT (metric, group_key) DO UPDATE SET count = stat_counters.count + p_delta;
+    END;
+    $$ LANGUAGE plpgsql
+""")
+
+event.listen(Base.metadata, "after_create", _PG_BUMP_FUNCTION.execute_if(dialect="postgresql"))
+for _table_name, _columns in STAT_GROUPS.items():
+    for _ddl in _pg_ddl(_table_name, _columns):
+        event.listen(Base.metadata, "after_create", _ddl.execute_if(dialect="postgresql"))
+    for _ddl in _sqlite_ddl(_table_name, _columns):
+        event.listen(Base.metadata, "after_create", _ddl.execute_if(dialect="sqlite"))
+
+# ============================================
+# READS
+# ============================================
+
+async def get_stats(db: AsyncSession, tables: List[str]) -> dict:
+    """Counts per group for the given tables, plus a total per table"""
+    metrics = [f"{table_name}.{c}" for table_name in tables for c in STAT_GROUPS[table_name]]
+    rows = await db.execute(
+        select(models.StatCounter.metric, models.StatCounter.group_key, models.StatCounter.count)
+        .where(models.StatCounter.metric.in_(metrics), models.StatCounter.count != 0)
+    )
+    result = {table_name: {"total": 0, **{c: {} for c in STAT_GROUPS[table_name]}} for table_name in tables}
+    for metric, group_key, count in rows:
+        table_name, c = metric.split(".", 1)
+        # The '' group holds rows where the column is NULL
+        result[table_name][c][group_key] = count
+    for table_name in tables:
+        # Every row is in exactly one group of each metric
+        result[table_name]["total"] = sum(result[table_name][STAT_GROUPS[table_name][0]].values())
+    return result
+
+# ============================================
+# CONSISTENCY CHECK
+# ============================================
+
+def _actual_counts_query():
+    """Counters recomputed from the tables, as (metric, group_key, count)"""
+    selects = []
+    for table_name, columns in STAT_GROUPS.items():
+        for c in columns:
+            source = table(table_name, column(c))
+            group_key = func.coalesce(cast(source.c[c], String), "")
+            selects.append(
+                select(literal(f"{table_name}.{c}").label("metric"), group_key.label("group_key"),
+                       func.count().label("count"))
+                .select_from(source).group_by(group_key)
+            )
+    return selects
+
+
+def check_counters(db: Session) -> List[dict]:
+    """Groups whose stored count differs from a fresh GROUP BY"""
+    if db.get_bind().dialect.name == "postgresql":
+        # One snapshot for the counters and the tables they summarize
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    actual = {}
+    for query in _actual_counts_query():
+        actual.update({(metric, key): count for metric, key, count in db.execute(query)})
+    stored = {
+        (metric, key): count
+        for metric, key, count in db.execute(
+            select(models.StatCounter.metric, models.StatCounter.group_key, models.StatCounter.count)
+        )
+    }
+    return [
+        {"metric": metric, "group": key, "stored": stored.get((metric, key), 0), "actual": actual.get((metric, key), 0)}
+        for metric, key in sorted(set(actual) | set(stored))
+        if stored.get((metric, key), 0) != actual.get((metric, key), 0)
+    ]
+
+
+def rebuild_counters(db: Session):
+    """Recompute every counter in one transaction"""
+    if db.get_bind().dialect.name == "postgresql":
+        # Block writers so no trigger increments a counter being replaced
+        db.execute(text(f"LOCK TABLE {', '.join(STAT_GROUPS)} IN SHARE MODE"))
+    db.execute(models.StatCounter.__table__.delete())
+    for query in _actual_counts_query():
+        db.execute(models.StatCounter.__table__.insert().from_select(["metric", "group_key", "count"], query))
+    db.commit()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Check or rebuild dashboard stat counters")
+    parser.add_argument("--rebuild", action="store_true", help="recompute all counters from the tables")
+    parser.add_argument("--check", action="store_true", help="report counters that differ (default)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.rebuild:
+            rebuild_counters(db)
+            print("✓ Counters rebuilt")
+        drift = check_counters(db)
+    finally:
+        db.close()
+
+    if drift:
+        print(json.dumps(drift, indent=2))
+        print(f"❌ {len(drift)} counters differ, run with --rebuild")
+        raise SystemExit(1)
+    print("✅ All counters match")
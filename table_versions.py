@@ -0,0 +1,158 @@
+"""
+Per-table change versions and conditional GET for the list endpoints.
+
+Every INSERT, UPDATE or DELETE on a tracked table bumps its row in
+table_versions from a database trigger (statement-level on PostgreSQL,
+row-level on SQLite), so handlers, bulk imports and raw SQL are all covered.
+A list endpoint hashes the versions of the tables its payload reads, the
+caller's identity and the request URL into a weak ETag. When it matches
+If-None-Match the endpoint answers 304 after one primary-key lookup, without
+running the list query.
+
+Versions are read before the data, so a write landing in between yields an
+older ETag with newer data; the next poll then sees a mismatch and refetches.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Iterable, Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy import DDL, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import Base
+
+TRACKED_TABLES = ("users", "job_postings", "referrals", "assets")
+
+# Tables each list payload is built from
+JOB_LIST_TABLES = ("job_postings", "referrals")  # referral counts
+REFERRAL_LIST_TABLES = ("referrals", "job_postings")  # job titles
+ASSET_LIST_TABLES = ("assets", "users")  # assignee department
+
+LIST_CACHE_CONTROL = "private, no-cache"
+
+# ============================================
+# SCHEMA
+# ============================================
+
+_SEED_ROWS = ", ".join(f"('{table}', 0)" for table in TRACKED_TABLES)
+
+_PG_DDL = [
+    DDL(f"INSERT INTO table_versions (table_name, version) VALUES {_SEED_ROWS} "
+        "ON CONFLICT (table_name) DO NOTHING"),
+    DDL("""
+        CREATE OR REPLACE FUNCTION bump_table_version()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """),
+] + [
+    ddl
+    for table in TRACKED_TABLES
+    for ddl in (
+        DDL(f"DROP TRIGGER IF EXISTS bump_{table}_version ON {table}"),
+        DDL(f"CREATE TRIGGER bump_{table}_version AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"),
+    )
+]
+
+_SQLITE_DDL = [
+    DDL(f"INSERT OR IGNORE INTO table_versions (table_name, version) VALUES {_SEED_ROWS}"),
+] + [
+    DDL(f"CREATE TRIGGER IF NOT EXISTS bump_{table}_version_{operation.lower()} AFTER {operation} ON {table} "
+        f"BEGIN UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}'; END")
+    for table in TRACKED_TABLES
+    for operation in ("INSERT", "UPDATE", "DELETE")
+]
+
+# After the whole metadata is created, so table_versions and the tracked tables all exist
+for _ddl in _PG_DDL:
+    event.listen(Base.metadata, "after_create", _ddl.execute_if(dialect="postgresql"))
+for _ddl in _SQLITE_DDL:
+    event.listen(Base.metadata, "after_create", _ddl.execute_if(dialect="sqlite"))
+
+# ============================================
+# CONDITIONAL GET
+# ============================================
+
+class ConditionalGetStats:
+    def __init__(self):
+        self.not_modified = 0
+        self.full_responses = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.not_modified += 1
+            else:
+                self.full_responses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.not_modified + self.full_responses
+            return {
+                "not_modified": self.not_modified,
+                "full_responses": self.full_responses,
+                "hit_ratio": round(self.not_modified / total, 4) if total else None,
+            }
+
+
+conditional_get_stats = ConditionalGetStats()
+
+
+async def get_table_versions(db: AsyncSession, tables: Iterable[str]) -> dict:
+    rows = await db.execute(
+        select(models.TableVersion.table_name, models.TableVersion.version)
+        .where(models.TableVersion.table_name.in_(list(tables)))
+    )
+    return dict(rows.all())
+
+
+def list_etag(request: Request, versions: dict, principal) -> str:
+    """Weak ETag over table versions, caller scope and the exact query"""
+    key = json.dumps([
+        request.url.path,
+        sorted(request.query_params.multi_items()),
+        principal.id,
+        principal.role,
+        sorted(versions.items()),
+    ])
+    return f'W/"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def _weak_match(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+async def conditional_list(
+    db: AsyncSession,
+    request: Request,
+    response: Response,
+    tables: Iterable[str],
+    principal
+) -> Optional[Response]:
+    """Return a 304 response if the client's copy is current, else tag response and return None"""
+    tables = list(tables)
+    versions = await get_table_versions(db, tables)
+    if len(versions) < len(tables):
+        # Triggers not installed (migration 005 not applied): never claim freshness
+        return None
+    etag = list_etag(request, versions, principal)
+    headers = {"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    hit = if_none_match is not None and _weak_match(if_none_match, etag)
+    conditional_get_stats.record(hit)
+    if hit:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
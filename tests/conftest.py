@@ -0,0 +1,46 @@
+"""
+Shared setup: a seeded SQLite database and the app in strict query-budget mode.
+
+Settings are read at import time, so the environment is set before any
+project module is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+WORKDIR = tempfile.mkdtemp(prefix="referral_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/test.db"
+os.environ["QUERY_BUDGET_MODE"] = "strict"
+os.environ["EXTRACTION_ENABLED"] = "0"
+os.chdir(WORKDIR)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import seed  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    seed.seed_database(seed.plan_counts("demo"), reset=True)
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def _login(client, email: str, password: str) -> dict:
+    response = client.post("/api/auth/login", data={"username": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return _login(client, "admin@company.com", "admin123")
+
+
+@pytest.fixture(scope="session")
+def employee_headers(client):
+    return _login(client, "employee@company.com", "employee123")
@@ -0,0 +1,89 @@
+"""
+Every @query_budget route stays within its budget (conftest.py runs the app
+with QUERY_BUDGET_MODE=strict), and a handler that queries in a loop fails.
+"""
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.routing import Match
+
+import main
+import models
+from database import get_async_db
+from query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, query_budget
+from seed import DEMO_EMPLOYEE_ID
+
+BUDGETED_URLS = [
+    "/api/auth/me",
+    "/api/jobs",
+    "/api/jobs?status=open",
+    "/api/jobs/1",
+    "/api/referrals",
+    "/api/referrals?status=submitted",
+    "/api/referrals?job_id=1&limit=5",
+    "/api/referrals/my-referrals",
+    "/api/referrals/1",
+    "/api/search/referrals?q=python",
+    "/api/search/jobs?q=engineer",
+    "/api/jobs/1/matches",
+    "/api/referrals/1/matches",
+    "/api/assets",
+    "/api/assets?status=assigned",
+    "/api/assets/1",
+    "/api/assets/1/history",
+    f"/api/assets/assignees/{DEMO_EMPLOYEE_ID}/history",
+    "/api/stats",
+]
+
+
+def _route_path(url: str) -> str:
+    scope = {"type": "http", "path": url.split("?")[0], "method": "GET"}
+    for route in main.app.routes:
+        if route.matches(scope)[0] == Match.FULL:
+            return route.path
+
+
+def test_every_budgeted_route_is_covered():
+    budgeted = {
+        route.path for route in main.app.routes
+        if hasattr(getattr(route, "endpoint", None), "__query_budget__")
+    }
+    assert budgeted == {_route_path(url) for url in BUDGETED_URLS}
+
+
+@pytest.mark.parametrize("url", BUDGETED_URLS)
+def test_route_within_budget(client, admin_headers, url):
+    response = client.get(url, headers=admin_headers)
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize("url", ["/api/referrals?limit=5", "/api/referrals/my-referrals?limit=1", "/api/assets?limit=5"])
+def test_next_page_within_budget(client, admin_headers, employee_headers, url):
+    headers = employee_headers if "my-referrals" in url else admin_headers
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200, first.text
+    cursor = first.headers.get("X-Next-Cursor")
+    assert cursor, "seed data should fill more than one page"
+    second = client.get(f"{url}&cursor={cursor}", headers=headers)
+    assert second.status_code == 200, second.text
+
+
+def test_n_plus_one_handler_exceeds_budget(client):
+    app = FastAPI()
+    app.add_middleware(QueryBudgetMiddleware)
+
+    @app.get("/referral-jobs")
+    @query_budget(2)
+    async def referral_jobs(db: AsyncSession = Depends(get_async_db)):
+        referrals = (await db.scalars(select(models.Referral).limit(5))).all()
+        # One job query per referral, the loop the list endpoints used to run
+        return [
+            await db.scalar(select(models.JobPosting.job_title).where(models.JobPosting.id == referral.job_id))
+            for referral in referrals
+        ]
+
+    with pytest.raises(QueryBudgetExceeded, match="budget is 2"):
+        TestClient(app).get("/referral-jobs")
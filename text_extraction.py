@@ -0,0 +1,288 @@
+"""
+Background text extraction for uploaded resumes and job descriptions.
+
+Upload handlers only queue a pending document_texts row for the stored blob
+in the same transaction as the referral or job, so request latency does not
+depend on parsing. ExtractionWorker, started from the app lifespan, claims
+pending rows with a conditional UPDATE (safe with several API workers), parses
+them on a process pool and stores the text or the error.
+
+Rows are keyed by file path. Uploads are content-addressed, so a replaced
+file is a new path and gets its own row, while re-uploading the same file
+reuses the finished one. Failed rows, and rows left in 'processing' by a
+crashed worker, are retried EXTRACTION_CLAIM_TIMEOUT seconds after their last
+claim, up to EXTRACTION_MAX_ATTEMPTS tries in total.
+
+Extracted JD text is copied to job_postings.job_description_text of every job
+whose job_description_url is that file, which makes it searchable, and the
+job is flagged job_description_extracted. Text that was extracted before is
+overwritten, so replacing a JD file replaces the description; a typed
+description is kept. A file that was already extracted is copied to the job
+when it is queued, since it will not be processed again.
+
+.docx and plain-text files are supported; other formats are marked
+'unsupported'.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+from xml.etree import ElementTree
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_ENABLED = os.getenv("EXTRACTION_ENABLED", "1") == "1"
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "2"))
+EXTRACTION_POLL_SECONDS = float(os.getenv("EXTRACTION_POLL_SECONDS", "10"))
+EXTRACTION_CLAIM_TIMEOUT = int(os.getenv("EXTRACTION_CLAIM_TIMEOUT", "600"))
+EXTRACTION_MAX_ATTEMPTS = int(os.getenv("EXTRACTION_MAX_ATTEMPTS", "3"))
+
+MAX_EXTRACTED_CHARS = 500_000
+MAX_DOCX_XML_BYTES = 50 * 1024 * 1024
+TEXT_SUFFIXES = {".txt", ".md"}
+
+# ============================================
+# PARSING (runs in worker processes)
+# ============================================
+
+class UnsupportedDocument(Exception):
+    pass
+
+
+def _docx_text(path: str) -> str:
+    """Paragraph text of word/document.xml, streamed with iterparse"""
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo("word/document.xml")
+        if info.file_size > MAX_DOCX_XML_BYTES:
+            raise ValueError("document.xml is too large")
+        paragraphs, current = [], []
+        with archive.open(info) as xml:
+            for _, element in ElementTree.iterparse(xml, events=("end",)):
+                tag = element.tag.rsplit("}", 1)[-1]
+                if tag == "t":
+                    current.append(element.text or "")
+                elif tag == "tab":
+                    current.append("\t")
+                elif tag in ("br", "cr"):
+                    current.append("\n")
+                elif tag == "p":
+                    paragraphs.append("".join(current))
+                    current = []
+                    element.clear()
+    return "\n".join(paragraph for paragraph in paragraphs if paragraph.strip())
+
+
+def extract_text(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix == ".docx":
+        text = _docx_text(path)
+    elif suffix in TEXT_SUFFIXES:
+        with open(path, encoding="utf-8", errors="replace") as source:
+            text = source.read(MAX_EXTRACTED_CHARS)
+    else:
+        raise UnsupportedDocument(f"No text extractor for '{suffix or 'no extension'}' files")
+    return text[:MAX_EXTRACTED_CHARS]
+
+# ============================================
+# QUEUE
+# ============================================
+
+def _fill_job_descriptions(path: str, text):
+    """Copy JD text onto the jobs using this file, unless their description was typed"""
+    return (
+        update(models.JobPosting)
+        .where(
+            models.JobPosting.job_description_url == path,
+            or_(
+                models.JobPosting.job_description_extracted.is_(True),
+                models.JobPosting.job_description_text.is_(None),
+                models.JobPosting.job_description_text == "",
+            ),
+        )
+        .values(job_description_text=text, job_description_extracted=True)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def queue_extraction(db: AsyncSession, path: Optional[str], kind: str):
+    """Add a pending row for an upload unless it already has one.
+
+    Runs in the caller's transaction; call extraction_worker.notify() after commit.
+    """
+    if not path:
+        return
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    now = datetime.utcnow()
+    await db.execute(
+        dialect.insert(models.DocumentText)
+        .values(file_path=path, kind=kind, status="pending", attempts=0, created_at=now, updated_at=now)
+        .on_conflict_do_nothing(index_elements=[models.DocumentText.file_path])
+    )
+    if kind == "job_description":
+        # A re-uploaded file keeps its finished row and is not extracted again
+        done_text = (
+            select(models.DocumentText.text)
+            .where(models.DocumentText.file_path == path, models.DocumentText.status == "done")
+            .scalar_subquery()
+        )
+        await db.flush()  # the caller's job row must carry the new path
+        await db.execute(_fill_job_descriptions(path, done_text).where(done_text.is_not(None)))
+
+
+def _claimable(now: datetime):
+    stale = now - timedelta(seconds=EXTRACTION_CLAIM_TIMEOUT)
+    return and_(
+        models.DocumentText.attempts < EXTRACTION_MAX_ATTEMPTS,
+        or_(
+            models.DocumentText.status == "pending",
+            and_(models.DocumentText.status.in_(["processing", "failed"]), models.DocumentText.claimed_at < stale),
+        ),
+    )
+
+
+async def claim_documents(db: AsyncSession, limit: int) -> list:
+    """Mark up to limit claimable rows as processing and return (id, path, kind)"""
+    now = datetime.utcnow()
+    candidates = (await db.scalars(
+        select(models.DocumentText.id).where(_claimable(now)).order_by(models.DocumentText.id).limit(limit)
+    )).all()
+    if not candidates:
+        return []
+    # Re-checking the condition in the UPDATE means a row another worker
+    # claimed in between is skipped rather than processed twice
+    claimed = (await db.execute(
+        update(models.DocumentText)
+        .where(models.DocumentText.id.in_(candidates), _claimable(now))
+        .values(status="processing", claimed_at=now, attempts=models.DocumentText.attempts + 1, updated_at=now)
+        .returning(models.DocumentText.id, models.DocumentText.file_path, models.DocumentText.kind)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await db.commit()
+    return claimed
+
+
+async def store_result(db: AsyncSession, doc_id: int, path: str, kind: str, text: Optional[str], error: Optional[BaseException]):
+    now = datetime.utcnow()
+    if error is None:
+        values = {"status": "done", "text": text, "error": None, "extracted_at": now}
+    elif isinstance(error, UnsupportedDocument):
+        values = {"status": "unsupported", "text": None, "error": str(error)}
+    else:
+        values = {"status": "failed", "text": None, "error": f"{type(error).__name__}: {error}"[:1000]}
+    await db.execute(
+        update(models.DocumentText)
+        .where(models.DocumentText.id == doc_id, models.DocumentText.status == "processing")
+        .values(**values, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if error is None and kind == "job_description" and text:
+        await db.execute(_fill_job_descriptions(path, text))
+    await db.commit()
+
+# ============================================
+# WORKER
+# ============================================
+
+class ExtractionWorker:
+    """Polls for pending documents and parses them on a process pool"""
+
+    def __init__(self, workers: int, poll_seconds: float):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.processed = 0
+        self.failed = 0
+        self._executor = None
+        self._task = None
+        self._wakeup = asyncio.Event()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._executor = self._new_executor()
+        self._task = asyncio.create_task(self._run())
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: the API process runs threads (hashing pool), which fork does not copy safely
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=200
+        )
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def notify(self):
+        """Wake the worker after new documents were queued"""
+        self._wakeup.set()
+
+    async def _process(self, doc_id: int, path: str, kind: str):
+        loop = asyncio.get_running_loop()
+        text, error = None, None
+        executor = self._executor
+        try:
+            text = await loop.run_in_executor(executor, extract_text, path)
+        except BrokenProcessPool as exc:
+            # A child died (OOM, crash); replace the pool once and let the row retry
+            error = exc
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+        except Exception as exc:
+            error = exc
+        async with AsyncSessionLocal() as db:
+            await store_result(db, doc_id, path, kind, text, error)
+        if error is None or isinstance(error, UnsupportedDocument):
+            self.processed += 1
+        else:
+            self.failed += 1
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                async with AsyncSessionLocal() as db:
+                    claimed = await claim_documents(db, self.workers * 2)
+                await asyncio.gather(*(self._process(*row) for row in claimed))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Text extraction batch failed")
+                claimed = []
+            if not claimed:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+extraction_worker = ExtractionWorker(EXTRACTION_WORKERS, EXTRACTION_POLL_SECONDS)
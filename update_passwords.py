@@ -1,55 +1,157 @@
 """
-Script to update user passwords in the database
-Run this to fix password authentication
+Bulk-set user passwords from a CSV of email,password rows.
+
+For provisioning or resetting many accounts at once. Passwords are hashed
+with hashing.pwd_context (so at the current BCRYPT_ROUNDS) across a process
+pool, and each batch is written with one UPDATE ... FROM (VALUES ...) and
+committed. After every batch the number of input rows done is saved to a
+checkpoint file; rerunning the same command resumes after the last committed
+batch. Progress goes to stderr. The database comes from DATABASE_URL.
+
+Existing hashes cannot be upgraded without the password, so a cost-factor
+change needs no bulk run: login rehashes outdated hashes on the next
+successful sign-in.
+
+    python update_passwords.py passwords.csv
+    python update_passwords.py passwords.csv --workers 8 --batch-size 1000
+    python update_passwords.py --demo-accounts        # reset the seed.py demo logins
+
+Emails not found in users are counted as missing and skipped, as are rows
+with an empty email or password (counted as malformed).
 """
-from passlib.context import CryptContext
-import psycopg2
-
-# Password context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Database connection
-conn = psycopg2.connect(
-    dbname="employee",
-    user="postgres",
-    password="admin",
-    host="localhost",
-    port="5432"
-)
-cursor = conn.cursor()
-
-# Users and their passwords
-users = [
-    ('admin@company.com', 'admin123'),
-    ('hr@company.com', 'hr123'),
-    ('inventory@company.com', 'inventory123'),
-    ('employee@company.com', 'employee123'),
-]
-
-print("Updating user passwords...")
-print("-" * 50)
-
-for email, password in users:
-    # Generate hash
-    hashed_password = pwd_context.hash(password)
-    
-    # Update database
-    cursor.execute(
-        "UPDATE users SET hashed_password = %s WHERE email = %s",
-        (hashed_password, email)
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from database import engine
+from hashing import pwd_context
+
+UPDATE_BATCH_SIZE = 500
+PROGRESS_INTERVAL_SECONDS = 5
+
+
+def hash_password(password: str) -> str:
+    # Module-level so worker processes can unpickle it
+    return pwd_context.hash(password)
+
+
+def read_credentials(path: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """(email, password) rows of a CSV with an email,password header; short rows yield None"""
+    with open(path, encoding="utf-8-sig", newline="") as source:
+        reader = csv.DictReader(source)
+        if not reader.fieldnames or not {"email", "password"} <= set(reader.fieldnames):
+            raise SystemExit(f"{path}: expected a header with email and password columns")
+        for row in reader:
+            yield (row["email"] or "").strip(), row["password"]
+
+
+def count_rows(path: str) -> int:
+    with open(path, encoding="utf-8-sig", newline="") as source:
+        return sum(1 for _ in csv.reader(source)) - 1
+
+
+def load_checkpoint(path: str) -> int:
+    try:
+        with open(path) as f:
+            return json.load(f)["rows_done"]
+    except FileNotFoundError:
+        return 0
+
+
+def save_checkpoint(path: str, rows_done: int):
+    # Replace atomically so an interrupted write never leaves a corrupt checkpoint
+    with open(path + ".tmp", "w") as f:
+        json.dump({"rows_done": rows_done}, f)
+    os.replace(path + ".tmp", path)
+
+
+def update_statement(size: int):
+    """One UPDATE for `size` rows; VALUES columns are column1/column2 on both PostgreSQL and SQLite"""
+    values = ", ".join(f"(:email_{i}, :hash_{i})" for i in range(size))
+    return text(
+        "UPDATE users SET hashed_password = v.column2, updated_at = :now "
+        f"FROM (VALUES {values}) AS v WHERE users.email = v.column1"
     )
-    
-    print(f"✓ Updated password for {email}")
-
-# Commit changes
-conn.commit()
-cursor.close()
-conn.close()
-
-print("-" * 50)
-print("✅ All passwords updated successfully!")
-print("\nYou can now login with:")
-print("  admin@company.com / admin123")
-print("  hr@company.com / hr123")
-print("  inventory@company.com / inventory123")
-print("  employee@company.com / employee123")
\ No newline at end of file
+
+
+def write_batch(connection, emails: List[str], hashes: List[str]) -> int:
+    params = {"now": datetime.utcnow()}
+    for i, (email, hashed) in enumerate(zip(emails, hashes)):
+        params[f"email_{i}"] = email
+        params[f"hash_{i}"] = hashed
+    return connection.execute(update_statement(len(emails)), params).rowcount
+
+
+def update_passwords(credentials: Iterator[Tuple[str, str]], total: int, workers: int, batch_size: int,
+                     checkpoint: Optional[str] = None) -> dict:
+    skip = load_checkpoint(checkpoint) if checkpoint else 0
+    report = {"total": total, "resumed_at": skip, "updated": 0, "missing": 0, "malformed": 0}
+    rows = itertools.islice(credentials, skip, None)
+    done = skip
+    started = last_progress = time.monotonic()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            valid = [(email, password) for email, password in batch if email and password]
+            report["malformed"] += len(batch) - len(valid)
+            if valid:
+                emails = [email for email, _ in valid]
+                hashes = list(pool.map(hash_password, [password for _, password in valid],
+                                       chunksize=max(1, len(valid) // (workers * 4))))
+                with engine.begin() as connection:
+                    updated = write_batch(connection, emails, hashes)
+                report["updated"] += updated
+                report["missing"] += len(valid) - updated
+            done += len(batch)
+            if checkpoint:
+                save_checkpoint(checkpoint, done)
+
+            now = time.monotonic()
+            if now - last_progress >= PROGRESS_INTERVAL_SECONDS or done == total:
+                last_progress = now
+                rate = (done - skip) / (now - started)
+                eta = (total - done) / rate if rate and total > done else 0
+                print(f"{done}/{total} rows, {rate:.0f} rows/s, eta {eta:.0f}s", file=sys.stderr)
+
+    report["seconds"] = round(time.monotonic() - started, 1)
+    if checkpoint and done >= total:
+        os.remove(checkpoint)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-set user passwords from a CSV of email,password rows")
+    parser.add_argument("path", nargs="?", help="CSV with email and password columns")
+    parser.add_argument("--demo-accounts", action="store_true", help="reset the demo account passwords from seed.py")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="hashing processes")
+    parser.add_argument("--batch-size", type=int, default=UPDATE_BATCH_SIZE)
+    parser.add_argument("--checkpoint", help="progress file for resuming (default: <path>.checkpoint)")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    if args.demo_accounts:
+        from seed import DEMO_ACCOUNTS
+
+        accounts = [(email, password) for email, password, *_ in DEMO_ACCOUNTS]
+        report = update_passwords(iter(accounts), len(accounts), args.workers, args.batch_size)
+    elif args.path:
+        checkpoint = args.checkpoint or args.path + ".checkpoint"
+        if args.restart and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        report = update_passwords(read_credentials(args.path), count_rows(args.path), args.workers,
+                                  args.batch_size, checkpoint)
+    else:
+        parser.error("pass a CSV path or --demo-accounts")
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,281 @@
+"""
+Content-addressed upload storage for resumes, candidate photos and job descriptions.
+
+Files are streamed to disk in chunks off the event loop, hashed with SHA-256
+while they are copied, and written to a temporary file that is renamed into
+place only once complete, so a crash never leaves a half-written upload.
+
+Each blob is stored as ``<sha256><ext>`` in its type directory, so the same
+resume referred for several jobs is kept once. A blob's references are the
+rows whose resume_url, candidate_photo_url or job_description_url point at it;
+unreferenced blobs are removed by release_upload and by gc_uploads.py.
+"""
+
+import hashlib
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, Request, Response, UploadFile, status
+from fastapi.responses import FileResponse
+from sqlalchemy import delete, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+import models
+
+UPLOAD_DIR = Path("uploads")
+RESUMES_DIR = UPLOAD_DIR / "resumes"
+PHOTOS_DIR = UPLOAD_DIR / "photos"
+JOB_DESCRIPTIONS_DIR = UPLOAD_DIR / "job_descriptions"
+
+for _directory in (UPLOAD_DIR, RESUMES_DIR, PHOTOS_DIR, JOB_DESCRIPTIONS_DIR):
+    _directory.mkdir(exist_ok=True)
+
+MB = 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1 * MB
+MAX_RESUME_BYTES = int(os.getenv("MAX_RESUME_BYTES", str(10 * MB)))
+MAX_PHOTO_BYTES = int(os.getenv("MAX_PHOTO_BYTES", str(5 * MB)))
+MAX_JOB_DESCRIPTION_BYTES = int(os.getenv("MAX_JOB_DESCRIPTION_BYTES", str(10 * MB)))
+
+# A referral carries a resume and a photo; allow some room for form fields
+MAX_UPLOAD_REQUEST_BYTES = int(os.getenv(
+    "MAX_UPLOAD_REQUEST_BYTES", str(MAX_RESUME_BYTES + MAX_PHOTO_BYTES + MB)
+))
+MAX_IMPORT_REQUEST_BYTES = int(os.getenv("MAX_IMPORT_REQUEST_BYTES", str(512 * MB)))
+
+TEMP_SUFFIX = ".part"
+
+# Blobs touched more recently than this are never deleted, which covers
+# uploads that have been written but whose row is not committed yet
+UPLOAD_GC_GRACE_SECONDS = int(os.getenv("UPLOAD_GC_GRACE_SECONDS", "3600"))
+
+
+@dataclass
+class StoredFile:
+    path: str
+    sha256: str
+    size: int
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the maximum size of {max_bytes} bytes"
+    )
+
+
+def _write_chunk(buffer, digest, chunk: bytes):
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+def _finish(buffer):
+    buffer.flush()
+    os.fsync(buffer.fileno())
+    buffer.close()
+
+
+def _discard(buffer, temp_path: Path):
+    buffer.close()
+    temp_path.unlink(missing_ok=True)
+
+
+def _commit_blob(temp_path: Path, file_path: Path):
+    """Move a finished upload into place, or reuse an identical stored blob"""
+    if file_path.exists():
+        temp_path.unlink()
+        # Refresh mtime so the GC grace period protects the reused blob
+        os.utime(file_path)
+    else:
+        os.replace(temp_path, file_path)
+
+
+async def save_upload_file(upload_file: UploadFile, directory: Path, max_bytes: int) -> StoredFile:
+    """Stream an upload into directory and return its path, digest and size"""
+    try:
+        # Starlette records the spooled size, so oversized files fail before any copy
+        if upload_file.size is not None and upload_file.size > max_bytes:
+            raise _too_large(max_bytes)
+
+        file_extension = Path(upload_file.filename or "").suffix.lower()
+        temp_path = directory / f".{uuid.uuid4().hex}{TEMP_SUFFIX}"
+
+        digest = hashlib.sha256()
+        size = 0
+        buffer = await run_in_threadpool(temp_path.open, "wb")
+        try:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+            await run_in_threadpool(_finish, buffer)
+        except BaseException:
+            await run_in_threadpool(_discard, buffer, temp_path)
+            raise
+
+        sha256 = digest.hexdigest()
+        file_path = directory / f"{sha256}{file_extension}"
+        await run_in_threadpool(_commit_blob, temp_path, file_path)
+        return StoredFile(path=str(file_path), sha256=sha256, size=size)
+    finally:
+        await upload_file.close()
+
+
+# ============================================
+# REFERENCE COUNTING
+# ============================================
+
+def referenced_paths_query(paths: Iterable[str]):
+    """Select which of the given paths are still referenced by any row"""
+    paths = list(paths)
+    return union(
+        select(models.Referral.resume_url.label("path")).where(models.Referral.resume_url.in_(paths)),
+        select(models.Referral.candidate_photo_url).where(models.Referral.candidate_photo_url.in_(paths)),
+        select(models.JobPosting.job_description_url).where(models.JobPosting.job_description_url.in_(paths)),
+    )
+
+
+def delete_blob_if_stale(path: str, grace_seconds: int = UPLOAD_GC_GRACE_SECONDS) -> bool:
+    """Delete a blob unless it was written or reused within the grace period"""
+    try:
+        if time.time() - os.stat(path).st_mtime < grace_seconds:
+            return False
+        os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+async def release_upload(db: AsyncSession, path: Optional[str]) -> bool:
+    """Delete a blob once the last row pointing at it is gone.
+
+    Call after the change that dropped the reference has been committed.
+    """
+    if not path:
+        return False
+    still_referenced = (await db.execute(referenced_paths_query([path]))).first()
+    if still_referenced:
+        return False
+    if not await run_in_threadpool(delete_blob_if_stale, path):
+        return False
+    await db.execute(delete(models.DocumentText).where(models.DocumentText.file_path == path))
+    await db.commit()
+    return True
+
+
+# ============================================
+# DOWNLOADS
+# ============================================
+
+CONTENT_HASH_NAME = re.compile(r"[0-9a-f]{64}")
+# Resized photo variants: <source sha256>-<size>.<ext>, see photo_variants.py
+VARIANT_NAME = re.compile(r"[0-9a-f]{64}-\d+\.\w+")
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def _not_modified_since(if_modified_since: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def file_download_response(
+    request: Request,
+    path: Optional[str],
+    download_name: str,
+    disposition: str = "attachment",
+    headers: Optional[dict] = None
+) -> Response:
+    """Serve a stored upload with Range, ETag and Last-Modified support.
+
+    Content-addressed blobs use their SHA-256 as a strong ETag and are cached as
+    immutable, as are photo variants (keyed by file name, since a size comes in
+    several formats); older uuid-named files fall back to an mtime/size ETag. The file
+    body is sent by FileResponse, which hands the path to the server
+    (http.response.pathsend) for sendfile when the server supports it.
+    """
+    if not path:
+        raise HTTPException(status_code=404, detail="File not found")
+    resolved = Path(path).resolve()
+    if not resolved.is_relative_to(UPLOAD_DIR.resolve()):
+        raise HTTPException(status_code=404, detail="File not found")
+    try:
+        stat_result = os.stat(resolved)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if CONTENT_HASH_NAME.fullmatch(resolved.stem):
+        etag = f'"{resolved.stem}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    elif VARIANT_NAME.fullmatch(resolved.name):
+        etag = f'"{resolved.name}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        cache_control = REVALIDATE_CACHE_CONTROL
+    headers = {
+        **(headers or {}),
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": cache_control,
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if (_etag_matches(if_none_match, etag) if if_none_match is not None
+            else if_modified_since and _not_modified_since(if_modified_since, stat_result.st_mtime)):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(
+        resolved,
+        stat_result=stat_result,
+        headers=headers,
+        filename=f"{download_name}{resolved.suffix}",
+        content_disposition_type=disposition,
+    )
+
+
+class UploadSizeLimitMiddleware:
+    """Reject multipart requests whose declared body is over the limit
+    before Starlette spools them to disk"""
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_REQUEST_BYTES, path_limits: Optional[dict] = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = path_limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            headers = dict(scope["headers"])
+            content_type = headers.get(b"content-type", b"")
+            content_length = headers.get(b"content-length")
+            max_bytes = self.path_limits.get(scope["path"], self.max_bytes)
+            if (content_type.startswith(b"multipart/") and content_length
+                    and content_length.isdigit() and int(content_length) > max_bytes):
+                await send({
+                    "type": "http.response.start",
+                    "status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    "headers": [(b"content-type", b"application/json")],
+                })
+                await send({
+                    "type": "http.response.body",
+                    "body": b'{"detail":"Request body too large"}',
+                })
+                return
+        await self.app(scope, receive, send)